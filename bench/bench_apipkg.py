@@ -0,0 +1,293 @@
+"""
+benchmarks for the lazy namespace machinery of apipkg.
+
+stdlib only and offline, run from a checkout with apipkg installed::
+
+    python bench/bench_apipkg.py                      # all benchmarks, text
+    python bench/bench_apipkg.py --quick -k access    # subset, fewer sizes
+    python bench/bench_apipkg.py --json current.json
+    python bench/bench_apipkg.py --compare baseline.json --tolerance 0.25
+
+every benchmark reports seconds (lower is better). with ``--compare`` the
+exit status is 1 if any metric got slower than the baseline by more than
+the tolerance, which allows gating CI on it.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import types
+from typing import Callable
+from typing import Dict
+
+import apipkg
+
+Results = Dict[str, float]
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], Results]] = {}
+BACKENDS = ("apimodule", "pep562")
+SIZES = (10, 100, 1000, 10000, 50000)
+QUICK_SIZES = (10, 1000)
+
+_counter = itertools.count()
+
+
+def benchmark(fn: Callable[[argparse.Namespace], Results]):
+    BENCHMARKS[fn.__name__.replace("bench_", "")] = fn
+    return fn
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """best time of repeat runs of number calls, per call"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def unique_name(prefix: str) -> str:
+    return f"apipkg_bench_{prefix}_{next(_counter)}"
+
+
+def exportdefs(size: int, spec: str = "os.path:join") -> dict[str, str]:
+    return {f"name{i}": spec for i in range(size)}
+
+
+def forget(name: str) -> None:
+    for modname in [m for m in sys.modules if m == name or m.startswith(name + ".")]:
+        del sys.modules[modname]
+
+
+def new_namespace(size: int, prefix: str = "ns", **kwargs) -> types.ModuleType:
+    return apipkg.initpkg(unique_name(prefix), exportdefs(size), **kwargs)
+
+
+@benchmark
+def bench_initpkg(args: argparse.Namespace) -> Results:
+    """cold initpkg cost by number of exports"""
+    results = {}
+    for backend, size in itertools.product(BACKENDS, args.sizes):
+        defs = exportdefs(size)
+
+        def run():
+            name = unique_name("initpkg")
+            apipkg.initpkg(name, defs, backend=backend)
+            forget(name)
+
+        results[f"initpkg[{backend}-{size}]"] = best_of(run, repeat=args.repeat)
+    return results
+
+
+@benchmark
+def bench_first_access(args: argparse.Namespace) -> Results:
+    """latency of the first access of an export, averaged per name"""
+    results = {}
+    for backend, size in itertools.product(BACKENDS, args.sizes):
+        names = list(exportdefs(size))
+        timings = []
+        for _ in range(args.repeat):
+            mod = new_namespace(size, "first", backend=backend)
+            start = time.perf_counter()
+            for name in names:
+                getattr(mod, name)
+            timings.append((time.perf_counter() - start) / size)
+            forget(mod.__name__)
+        results[f"first_access[{backend}-{size}]"] = min(timings)
+    return results
+
+
+@benchmark
+def bench_steady_access(args: argparse.Namespace) -> Results:
+    """attribute access after resolution, compared with a plain module"""
+    number = 100000
+    plain = types.ModuleType("plain")
+    plain.name0 = os.path.join  # type: ignore[attr-defined]
+    results = {
+        "steady_access[plain]": best_of(lambda: plain.name0, number=number),
+        "steady_access[os.path.join]": best_of(lambda: os.path.join, number=number),
+    }
+    for backend in BACKENDS:
+        mod = new_namespace(10, "steady", backend=backend)
+        alias = apipkg.initpkg(
+            unique_name("alias"), {"path": "os.path"}, backend=backend
+        )
+        mod.name0
+        alias.path.join
+        results[f"steady_access[{backend}]"] = best_of(lambda: mod.name0, number=number)
+        results[f"steady_access[{backend}-alias]"] = best_of(
+            lambda: alias.path.join, number=number
+        )
+        apipkg.freeze(mod)
+        results[f"steady_access[{backend}-frozen]"] = best_of(
+            lambda: mod.name0, number=number
+        )
+        forget(mod.__name__)
+        forget(alias.__name__)
+    return results
+
+
+@benchmark
+def bench_miss(args: argparse.Namespace) -> Results:
+    """hasattr()/getattr(default) probes for names a namespace does not have"""
+    number = 100000
+    plain = types.ModuleType("plain")
+    results = {"miss[plain]": best_of(lambda: hasattr(plain, "absent"), number=number)}
+    for backend in BACKENDS:
+        mod = new_namespace(100, "miss", backend=backend)
+        mod.name0
+        results[f"miss[{backend}]"] = best_of(
+            lambda: hasattr(mod, "absent"), number=number
+        )
+        results[f"miss[{backend}-getattr-default]"] = best_of(
+            lambda: getattr(mod, "__wrapped__", None), number=number
+        )
+        forget(mod.__name__)
+    return results
+
+
+@benchmark
+def bench_introspection(args: argparse.Namespace) -> Results:
+    """dir() of a lazy namespace and vars() forcing it to load"""
+    results = {}
+    for backend, size in itertools.product(BACKENDS, args.sizes):
+        mod = new_namespace(size, "dir", backend=backend)
+        results[f"dir[{backend}-{size}]"] = best_of(
+            lambda: dir(mod), repeat=args.repeat
+        )
+        forget(mod.__name__)
+
+        def run_vars():
+            mod = new_namespace(size, "vars", backend=backend)
+            vars(mod)
+            forget(mod.__name__)
+
+        results[f"vars[{backend}-{size}]"] = best_of(run_vars, repeat=args.repeat)
+    return results
+
+
+@benchmark
+def bench_contention(args: argparse.Namespace) -> Results:
+    """wall time of threads resolving distinct slow exports at the same time"""
+    results = {}
+    modules = 32
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sys.path.insert(0, tmpdir)
+        try:
+            for backend, threads in itertools.product(BACKENDS, args.threads):
+                timings = []
+                for _ in range(args.repeat):
+                    prefix = unique_name("impl")
+                    for i in range(modules):
+                        with open(os.path.join(tmpdir, f"{prefix}_{i}.py"), "w") as f:
+                            f.write(
+                                textwrap.dedent(
+                                    """
+                                    import time
+                                    time.sleep(0.002)
+                                    value = object()
+                                    """
+                                )
+                            )
+                    mod = apipkg.initpkg(
+                        unique_name("contention"),
+                        {f"name{i}": f"{prefix}_{i}:value" for i in range(modules)},
+                        backend=backend,
+                    )
+                    timings.append(first_access_threaded(mod, modules, threads))
+                    forget(mod.__name__)
+                    for i in range(modules):
+                        forget(f"{prefix}_{i}")
+                results[f"contention[{backend}-{threads}-threads]"] = min(timings)
+        finally:
+            sys.path.remove(tmpdir)
+    return results
+
+
+def first_access_threaded(mod: types.ModuleType, names: int, threads: int) -> float:
+    barrier = threading.Barrier(threads + 1)
+
+    def run(offset: int) -> None:
+        barrier.wait()
+        for i in range(names):
+            getattr(mod, f"name{(i + offset) % names}")
+
+    workers = [
+        threading.Thread(target=run, args=(i * names // threads,))
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> list[str]:
+    regressions = []
+    for metric, value in sorted(results.items()):
+        before = baseline.get(metric)
+        if before and value > before * (1 + tolerance):
+            regressions.append(
+                f"{metric}: {before:.3g}s -> {value:.3g}s ({value / before - 1:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="select", help="only run benchmarks matching")
+    parser.add_argument("--quick", action="store_true", help="fewer sizes/repeats")
+    parser.add_argument("--json", metavar="PATH", help="write results as json")
+    parser.add_argument("--compare", metavar="PATH", help="baseline json to check")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    args.sizes = QUICK_SIZES if args.quick else SIZES
+    args.repeat = 2 if args.quick else 5
+    args.threads = (1, 4) if args.quick else (1, 2, 4, 8)
+
+    results: Results = {}
+    for name, fn in BENCHMARKS.items():
+        if args.select and args.select not in name:
+            continue
+        for metric, value in fn(args).items():
+            results[metric] = value
+            print(f"{metric:<40} {value:12.3e}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "apipkg": apipkg.__version__,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
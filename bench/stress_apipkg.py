@@ -0,0 +1,338 @@
+"""
+concurrency stress test and thread scaling report for apipkg namespaces.
+
+stdlib only and offline, runs on regular and free-threaded (3.13t) builds::
+
+    python bench/stress_apipkg.py                     # default thread counts
+    python bench/stress_apipkg.py --threads 1,4,16 --rounds 20
+    python bench/stress_apipkg.py --locking per-export
+    python -X gil=0 bench/stress_apipkg.py --json stress.json
+
+every round creates fresh namespaces over fresh implementation modules and
+lets all threads race on their first access, in a different order per
+thread, then hammers the resolved names. it checks that each implementation
+module was imported exactly once and that every thread got the very same
+objects, the exit status is 1 if any round broke that. the report lists the
+first access wall time and the steady state throughput per thread count,
+for each locking strategy (``apipkg.set_locking``).
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import types
+from typing import Callable
+from typing import Dict
+from typing import TypedDict
+
+import apipkg
+
+BACKENDS = ("apimodule", "pep562")
+LOCKINGS = ("global", "per-export")
+
+
+class Options(TypedDict, total=False):
+    batch: bool
+    defer: bool
+    replace_aliases: bool
+    lazy_aliases: bool
+
+
+# initpkg options varied per round, each also stressing its own code path
+VARIANTS: dict[str, Options] = {
+    "plain": {},
+    "batch": {"batch": True},
+    "defer": {"defer": True},
+    "replace-aliases": {"replace_aliases": True},
+    "lazy-aliases": {"lazy_aliases": True},
+}
+LOG_MODULE = "apipkg_stress_log"
+
+Accessor = Callable[[], object]
+
+
+def gil_enabled() -> bool:
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_enabled is None else bool(is_enabled())
+
+
+def write_impls(tmpdir: str, prefix: str, count: int) -> list[str]:
+    """implementation modules logging their import and exporting fresh objects"""
+    names = []
+    for i in range(count):
+        name = f"{prefix}_{i}"
+        with open(os.path.join(tmpdir, f"{name}.py"), "w") as f:
+            f.write(
+                textwrap.dedent(
+                    f"""
+                    import time
+                    import {LOG_MODULE}
+                    {LOG_MODULE}.imported.append(__name__)
+                    # widen the window in which other threads race on the name
+                    time.sleep(0.0005)
+                    class Value:
+                        attr = object()
+                    value = Value()
+                    other = object()
+                    """
+                )
+            )
+        names.append(name)
+    return names
+
+
+def make_namespace(
+    index: int, impls: list[str], backend: str, options: Options
+) -> tuple[types.ModuleType, list[str]]:
+    """a namespace exporting from impls, returns it and its dotted exports"""
+    exportdefs: dict[str, object] = {}
+    sub: dict[str, str] = {}
+    for i, impl in enumerate(impls):
+        exportdefs[f"value{i}"] = f"{impl}:value"
+        exportdefs[f"nested{i}"] = f"{impl}:Value.attr"
+        exportdefs[f"alias{i}"] = impl
+        sub[f"other{i}"] = f"{impl}:other"
+    exportdefs["sub"] = sub
+    name = f"apipkg_stress_ns_{index}"
+    mod = apipkg.initpkg(name, exportdefs, backend=backend, **options)
+    # a bare alias is a proxy or (with replace_aliases) the module, so the
+    # alias identity is checked through an attribute of its target
+    dotted = [
+        *(n for n in exportdefs if n.startswith(("value", "nested"))),
+        *(f"sub.{n}" for n in sub),
+        *(f"alias{i}.other" for i in range(len(impls))),
+    ]
+    return mod, dotted
+
+
+def resolve(mod: types.ModuleType, dotted: str) -> object:
+    obj: object = mod
+    for part in dotted.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def expected(dotted: str, impls: list[str]) -> object:
+    """the object dotted must resolve to, looked up in the real module"""
+    head, _, rest = dotted.partition(".")
+    kind = head.rstrip("0123456789")
+    if kind == "sub":
+        impl = sys.modules[impls[int(rest[len("other") :])]]
+        return impl.other  # type: ignore[attr-defined]
+    impl = sys.modules[impls[int(head[len(kind) :])]]
+    if kind == "value":
+        return impl.value  # type: ignore[attr-defined]
+    if kind == "nested":
+        return impl.Value.attr  # type: ignore[attr-defined]
+    return impl.other  # type: ignore[attr-defined]
+
+
+def run_threads(threads: int, target: Callable[[int], None]) -> float:
+    """wall time of threads running target(index) released at once"""
+    barrier = threading.Barrier(threads + 1)
+    errors: list[BaseException] = []
+
+    def run(index: int) -> None:
+        barrier.wait()
+        try:
+            target(index)
+        except BaseException as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return elapsed
+
+
+def stress_round(
+    tmpdir: str,
+    round_index: int,
+    threads: int,
+    args: argparse.Namespace,
+    backend: str,
+    variant: str,
+) -> tuple[float, float, list[str]]:
+    """first access time, steady accesses per second and the violations"""
+    log = sys.modules[LOG_MODULE]
+    prefix = f"apipkg_stress_impl_{round_index}"
+    impls = write_impls(tmpdir, prefix, args.modules)
+    namespaces = [
+        make_namespace(
+            round_index * args.namespaces + i, impls, backend, VARIANTS[variant]
+        )
+        for i in range(args.namespaces)
+    ]
+    accessors: list[tuple[str, Accessor]] = [
+        (f"{mod.__name__}.{dotted}", functools.partial(resolve, mod, dotted))
+        for mod, names in namespaces
+        for dotted in names
+    ]
+    seen: list[dict[str, object]] = [{} for _ in range(threads)]
+
+    def first_access(index: int) -> None:
+        order = list(accessors)
+        random.Random(round_index * 1000 + index).shuffle(order)
+        for name, access in order:
+            seen[index][name] = access()
+
+    first = run_threads(threads, first_access)
+
+    violations = []
+    imported = [name for name in log.imported if name.startswith(prefix + "_")]
+    for impl in impls:
+        count = imported.count(impl)
+        if count != 1:
+            violations.append(f"{impl} imported {count} times")
+    for mod, names in namespaces:
+        for dotted in names:
+            name = f"{mod.__name__}.{dotted}"
+            want = expected(dotted, impls)
+            got = {id(seen[i][name]) for i in range(threads)}
+            if len(got) > 1:
+                violations.append(f"{name} resolved to {len(got)} distinct objects")
+            elif got != {id(want)}:
+                violations.append(f"{name} resolved to another object than its target")
+            if resolve(mod, dotted) is not want:
+                violations.append(f"{name} changed after resolution")
+
+    per_thread = args.accesses // threads
+
+    def steady(index: int) -> None:
+        count = len(accessors)
+        for i in range(per_thread):
+            accessors[(i + index) % count][1]()
+
+    steady_rate = per_thread * threads / run_threads(threads, steady)
+
+    for mod, _ in namespaces:
+        forget(mod.__name__)
+    for impl in impls:
+        forget(impl)
+    return first, steady_rate, violations
+
+
+def forget(name: str) -> None:
+    for modname in [m for m in sys.modules if m == name or m.startswith(name + ".")]:
+        del sys.modules[modname]
+
+
+Results = Dict[str, Dict[str, float]]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--threads",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1, 2, 4, 8, 16],
+        help="comma separated thread counts",
+    )
+    parser.add_argument(
+        "--locking",
+        type=lambda s: s.split(","),
+        default=list(LOCKINGS),
+        help="comma separated locking strategies",
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per setting")
+    parser.add_argument("--namespaces", type=int, default=8)
+    parser.add_argument("--modules", type=int, default=16, help="impl modules/round")
+    parser.add_argument("--accesses", type=int, default=200000, help="steady total")
+    parser.add_argument("--quick", action="store_true", help="small and fast")
+    parser.add_argument("--json", metavar="PATH", help="write results as json")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.threads = [1, 4]
+        args.rounds = 1
+        args.namespaces = 2
+        args.modules = 4
+        args.accesses = 20000
+
+    print(
+        f"{platform.python_implementation()} {platform.python_version()}"
+        f" gil={'enabled' if gil_enabled() else 'disabled'}"
+    )
+    results: Results = {}
+    failures: list[str] = []
+    round_index = 0
+    log = types.ModuleType(LOG_MODULE)
+    log.imported = []  # type: ignore[attr-defined]
+    sys.modules[LOG_MODULE] = log
+    settings = [
+        (locking, backend, variant)
+        for locking in args.locking
+        for backend in BACKENDS
+        for variant in VARIANTS
+    ]
+    previous_locking = apipkg.set_locking(args.locking[0])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sys.path.insert(0, tmpdir)
+        try:
+            for locking, backend, variant in settings:
+                apipkg.set_locking(locking)
+                setting = f"{backend}-{variant}-{locking}"
+                baseline = None
+                for threads in args.threads:
+                    firsts, rates = [], []
+                    for _ in range(args.rounds):
+                        round_index += 1
+                        first, rate, violations = stress_round(
+                            tmpdir, round_index, threads, args, backend, variant
+                        )
+                        firsts.append(first)
+                        rates.append(rate)
+                        failures += [f"[{setting}-{threads}] {v}" for v in violations]
+                    rate = max(rates)
+                    baseline = baseline or rate
+                    key = f"{setting}-{threads}-threads"
+                    results[key] = {
+                        "first_access": min(firsts),
+                        "steady_per_second": rate,
+                        "scaling": rate / baseline,
+                    }
+                    print(
+                        f"{key:<50} first {min(firsts):9.3e}s"
+                        f"  steady {rate:11.4g}/s  x{rate / baseline:.2f}"
+                    )
+        finally:
+            sys.path.remove(tmpdir)
+            apipkg.set_locking(previous_locking)
+
+    for failure in failures:
+        print(f"FAILURE {failure}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "gil": gil_enabled(),
+                    "apipkg": apipkg.__version__,
+                    "locking": args.locking,
+                    "results": results,
+                    "failures": failures,
+                },
+                f,
+                indent=2,
+            )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
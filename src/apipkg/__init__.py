@@ -7,33 +7,210 @@ see https://pypi.python.org/pypi/apipkg
 """
 from __future__ import annotations
 
-__all__ = ["initpkg", "ApiModule", "AliasModule", "__version__", "distribution_version"]
+__all__ = [
+    "initpkg",
+    "ApiModule",
+    "LazyNamespaceDict",
+    "AliasModule",
+    "__version__",
+    "distribution_version",
+    "lazy_version",
+    "set_locking",
+    "set_lock_timeout",
+    "lock_stats",
+    "LockStats",
+    "namespace_lock_stats",
+    "lock_stats_openmetrics",
+    "prefetch",
+    "resolve_many",
+    "prefork_warmup",
+    "freeze",
+    "aresolve",
+    "awarm",
+    "eagerload",
+    "namespaces",
+    "namespace_status",
+    "NamespaceStatus",
+    "record_timings",
+    "timing_records",
+    "timing_report",
+    "record_accesses",
+    "access_records",
+    "AccessRecord",
+    "write_manifest",
+    "read_manifest",
+]
+import os
 import sys
+from types import ModuleType
 from typing import Any
+from typing import Iterable
+from typing import overload
+from typing import TYPE_CHECKING
 
+from . import _loading
+from ._aio import aresolve as aresolve
+from ._aio import awarm as awarm
 from ._alias_module import AliasModule
-from ._importing import distribution_version as distribution_version
+from ._dictview import LazyNamespaceDict as LazyNamespaceDict
+from ._loading import eagerload as eagerload
+from ._loading import freeze as freeze
+from ._loading import prefetch as prefetch
+from ._loading import prefork_warmup as prefork_warmup
+from ._loading import resolve_many as resolve_many
+from ._manifest import access_records as access_records
+from ._manifest import AccessRecord as AccessRecord
+from ._manifest import read_manifest as read_manifest
+from ._manifest import record_accesses as record_accesses
+from ._manifest import write_manifest as write_manifest
+from ._metadata import distribution_version as distribution_version
+from ._metadata import lazy_version as lazy_version
 from ._module import _initpkg
 from ._module import ApiModule
+from ._pep562 import _initpkg_pep562
+from ._registry import namespace_status as namespace_status
+from ._registry import namespaces as namespaces
+from ._registry import NamespaceStatus as NamespaceStatus
+from ._syncronized import lock_stats as lock_stats
+from ._syncronized import lock_stats_openmetrics as lock_stats_openmetrics
+from ._syncronized import LockStats as LockStats
+from ._syncronized import namespace_lock_stats as namespace_lock_stats
+from ._syncronized import set_lock_timeout as set_lock_timeout
+from ._syncronized import set_locking as set_locking
+from ._timing import record_timings as record_timings
+from ._timing import timing_records as timing_records
+from ._timing import timing_report as timing_report
 from ._version import version as __version__
 
+if TYPE_CHECKING:
+    from typing_extensions import Literal
+
+
+@overload
+def initpkg(
+    pkgname: str,
+    exportdefs: dict[str, Any],
+    attr: dict[str, object] | None = ...,
+    eager: bool = ...,
+    prefetch: bool | Iterable[str] = ...,
+    replace_aliases: bool = ...,
+    backend: Literal["apimodule"] = ...,
+    lazy_dict: bool = ...,
+    batch: bool = ...,
+    replay: str | os.PathLike[str] | None = ...,
+    replay_background: bool = ...,
+    defer: bool = ...,
+    lazy_aliases: bool = ...,
+) -> ApiModule:
+    ...
+
+
+@overload
+def initpkg(
+    pkgname: str,
+    exportdefs: dict[str, Any],
+    attr: dict[str, object] | None = ...,
+    eager: bool = ...,
+    prefetch: bool | Iterable[str] = ...,
+    replace_aliases: bool = ...,
+    backend: str = ...,
+    lazy_dict: bool = ...,
+    batch: bool = ...,
+    replay: str | os.PathLike[str] | None = ...,
+    replay_background: bool = ...,
+    defer: bool = ...,
+    lazy_aliases: bool = ...,
+) -> ModuleType:
+    ...
+
 
 def initpkg(
     pkgname: str,
     exportdefs: dict[str, Any],
     attr: dict[str, object] | None = None,
     eager: bool = False,
-) -> ApiModule:
-    """initialize given package from the export definitions."""
+    prefetch: bool | Iterable[str] = False,
+    replace_aliases: bool = False,
+    backend: str = "apimodule",
+    lazy_dict: bool = False,
+    batch: bool = False,
+    replay: str | os.PathLike[str] | None = None,
+    replay_background: bool = False,
+    defer: bool = False,
+    lazy_aliases: bool = False,
+) -> ModuleType:
+    """initialize given package from the export definitions.
+
+    with ``prefetch`` the exports are resolved on a background thread pool
+    while the package import returns immediately, an iterable of dotted
+    names gives the order in which they should be resolved first.
+
+    with ``replace_aliases`` module aliases replace themselves with the real
+    module in ``sys.modules`` and in their namespace once resolved.
+
+    ``backend="pep562"`` keeps the package a plain module with a module level
+    ``__getattr__``/``__dir__`` instead of turning it into an ``ApiModule``,
+    exports named ``__doc__`` are then resolved right away.
+
+    with ``lazy_dict`` reading the ``__dict__`` of an ``ApiModule`` (e.g. via
+    ``vars()``) returns a ``LazyNamespaceDict`` which lists pending exports
+    without importing them, its ``materialize()`` loads everything. the
+    ``"pep562"`` backend never imports on ``__dict__`` access anyway.
+
+    with ``batch`` resolving an export also resolves all other pending
+    exports of its namespace that come from the same implementation module.
+
+    with ``replay`` the exports of the package listed in that manifest (see
+    ``record_accesses`` and ``write_manifest``) are resolved right away, in
+    the recorded order, or on a background thread with ``replay_background``.
+    everything else stays lazy, a missing manifest replays nothing.
+
+    with ``defer`` nested namespaces and module aliases are only created
+    (and added to ``sys.modules``) when first accessed or imported, e.g. by
+    ``import pkgname.sub``. aliases with a dotted name are still created
+    right away.
+
+    with ``lazy_aliases`` module aliases are served the same way, but as the
+    aliased module itself instead of a proxy module. it is loaded through
+    ``importlib.util.LazyLoader`` and only executed on its first attribute
+    access (python 3.13+, earlier versions import it when the alias is
+    first accessed or imported).
+    """
     attr = attr or {}
     mod = sys.modules.get(pkgname)
 
-    mod = _initpkg(mod, pkgname, exportdefs, attr=attr)
+    if backend == "apimodule":
+        mod = _initpkg(
+            mod,
+            pkgname,
+            exportdefs,
+            attr=attr,
+            replace_aliases=replace_aliases,
+            lazy_dict=lazy_dict,
+            batch=batch,
+            defer=defer,
+            lazy_aliases=lazy_aliases,
+        )
+    elif backend == "pep562":
+        mod = _initpkg_pep562(
+            mod,
+            pkgname,
+            exportdefs,
+            attr=attr,
+            replace_aliases=replace_aliases,
+            batch=batch,
+            defer=defer,
+            lazy_aliases=lazy_aliases,
+        )
+    else:
+        raise ValueError(f"unknown backend {backend!r}")
 
     # eagerload in bypthon to avoid their monkeypatching breaking packages
     if "bpython" in sys.modules or eager:
-        for module in list(sys.modules.values()):
-            if isinstance(module, ApiModule):
-                getattr(module, "__dict__")
+        _loading.eagerload()
+    elif prefetch:
+        _loading.prefetch(mod, order=() if prefetch is True else prefetch)
+    if replay is not None:
+        _loading.replay(mod, read_manifest(replay), background=replay_background)
 
     return mod
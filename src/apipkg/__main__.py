@@ -0,0 +1,50 @@
+"""command line tools for apipkg managed packages: python -m apipkg --help"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from . import _check
+from . import _importgraph
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m apipkg")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    importgraph = commands.add_parser(
+        "importgraph",
+        help="report which modules each export of a package imports",
+        description=_importgraph.__doc__,
+    )
+    importgraph.add_argument("package", help="name of the initpkg managed package")
+    importgraph.add_argument("--json", action="store_true", help="json output")
+    importgraph.add_argument(
+        "--jobs", type=int, default=None, help="number of concurrent interpreters"
+    )
+    importgraph.set_defaults(main=_importgraph.main)
+
+    check = commands.add_parser(
+        "check",
+        help="resolve every export of a package and report the broken ones",
+        description=_check.__doc__,
+    )
+    check.add_argument("package", help="name of the initpkg managed package")
+    check.add_argument("--json", action="store_true", help="json output")
+    check.add_argument(
+        "--jobs", type=int, default=None, help="number of concurrent interpreters"
+    )
+    check.add_argument(
+        "--static",
+        action="store_true",
+        help="parse the implementation modules instead of importing them",
+    )
+    check.set_defaults(main=_check.main)
+
+    args = parser.parse_args(argv)
+    return int(args.main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from types import ModuleType
+from typing import Iterable
+
+from ._importing import _module_dict
+from ._loading import _resolve_dotted
+from ._loading import resolve_many
+from ._registry import _is_namespace
+
+_MISSING = object()
+
+
+def _cached(mod: ModuleType, dotted: str) -> object:
+    """the value of an already resolved dotted name, _MISSING otherwise"""
+    obj: object = mod
+    for part in dotted.split("."):
+        if not (isinstance(obj, ModuleType) and _is_namespace(obj)):
+            return _MISSING
+        ns = _module_dict(obj)
+        if part in ns["__map__"] or part not in ns:
+            return _MISSING
+        obj = ns[part]
+    return obj
+
+
+async def aresolve(
+    mod: ModuleType, name: str, executor: Executor | None = None
+) -> object:
+    """resolve name (dotted, relative to mod) without blocking the event loop.
+
+    an already resolved name is returned right away, otherwise the import
+    runs on executor (the loop's default one if None). it takes the same
+    once-cell as a plain attribute access, so concurrent accessors wait for
+    it instead of importing again.
+    """
+    value = _cached(mod, name)
+    if value is not _MISSING:
+        return value
+    # imported here as apipkg itself should not pull in asyncio
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, _resolve_dotted, mod, name)
+
+
+async def awarm(
+    mod: ModuleType,
+    names: Iterable[str] | None = None,
+    executor: Executor | None = None,
+) -> dict[str, object]:
+    """resolve_many on executor, without blocking the event loop"""
+    wanted = None if names is None else list(names)
+    if wanted is not None:
+        values = {name: _cached(mod, name) for name in wanted}
+        if all(value is not _MISSING for value in values.values()):
+            return values
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, resolve_many, mod, wanted)
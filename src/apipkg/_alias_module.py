@@ -1,40 +1,98 @@
 from __future__ import annotations
 
+import sys
+import threading
+import weakref
 from types import ModuleType
 
+from ._importing import _module_dict
 from ._importing import importobj
 
+_get = object.__getattribute__
+_set = object.__setattr__
 
-def AliasModule(modname: str, modpath: str, attrname: str | None = None) -> ModuleType:
-    cached_obj: object | None = None
+# live alias proxies, see _registry
+_aliases: weakref.WeakSet[ModuleType] = weakref.WeakSet()
+_aliases_lock = threading.Lock()
 
-    def getmod() -> object:
-        nonlocal cached_obj
-        if cached_obj is None:
-            cached_obj = importobj(modpath, attrname)
-        return cached_obj
 
-    x = modpath + ("." + attrname if attrname else "")
-    repr_result = f"<AliasModule {modname!r} for {x!r}>"
+class _AliasModule(ModuleType):
+    """proxy module forwarding attribute access to the target it aliases.
 
-    class AliasModule(ModuleType):
-        def __repr__(self) -> str:
-            return repr_result
+    one class shared by all aliases, the alias state lives in slots which
+    are read with object.__getattribute__ to get past the proxying.
+    """
 
-        def __getattribute__(self, name: str) -> object:
-            try:
-                return getattr(getmod(), name)
-            except ImportError:
-                if modpath == "pytest" and attrname is None:
-                    # hack for pylibs py.test
-                    return None
-                else:
-                    raise
+    __slots__ = ("_alias_modpath", "_alias_attrname", "_alias_parent", "_alias_obj")
 
-        def __setattr__(self, name: str, value: object) -> None:
-            setattr(getmod(), name, value)
+    def __repr__(self) -> str:
+        modpath, attrname = _alias_spec(self)
+        x = modpath + ("." + attrname if attrname else "")
+        return f"<AliasModule {_module_dict(self)['__name__']!r} for {x!r}>"
 
-        def __delattr__(self, name: str) -> None:
-            delattr(getmod(), name)
+    def __getattribute__(self, name: str) -> object:
+        try:
+            return getattr(_alias_target(self), name)
+        except ImportError:
+            if _alias_spec(self) == ("pytest", None):
+                # hack for pylibs py.test
+                return None
+            else:
+                raise
 
-    return AliasModule(str(modname))
+    def __setattr__(self, name: str, value: object) -> None:
+        setattr(_alias_target(self), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(_alias_target(self), name)
+
+
+def _alias_spec(alias: ModuleType) -> tuple[str, str | None]:
+    """the ``(modpath, attrname)`` an alias proxy stands for"""
+    return _get(alias, "_alias_modpath"), _get(alias, "_alias_attrname")
+
+
+def _alias_resolved(alias: ModuleType) -> bool:
+    return _get(alias, "_alias_obj") is not None
+
+
+def _alias_target(alias: ModuleType) -> object:
+    obj = _get(alias, "_alias_obj")
+    if obj is None:
+        obj = importobj(*_alias_spec(alias))
+        _set(alias, "_alias_obj", obj)
+        parent = _get(alias, "_alias_parent")
+        if parent is not None and isinstance(obj, ModuleType):
+            _replace_alias(alias, parent, obj)
+    return obj
+
+
+def _replace_alias(alias: ModuleType, parent: ModuleType, module: ModuleType) -> None:
+    modname = _module_dict(alias)["__name__"]
+    if sys.modules.get(modname) is alias:
+        sys.modules[modname] = module
+    leaf = modname.rpartition(".")[2]
+    if _module_dict(parent).get(leaf) is alias:
+        setattr(parent, leaf, module)
+
+
+def AliasModule(
+    modname: str,
+    modpath: str,
+    attrname: str | None = None,
+    parent: ModuleType | None = None,
+) -> ModuleType:
+    """lazy proxy module for modpath (or the attrname object in it).
+
+    if parent is given the alias steps aside once it has resolved to a module,
+    replacing itself in ``sys.modules`` and in parent with the real module so
+    further attribute access does not go through the proxy.
+    """
+    alias = _AliasModule(str(modname))
+    _set(alias, "_alias_modpath", modpath)
+    _set(alias, "_alias_attrname", attrname)
+    _set(alias, "_alias_parent", parent)
+    _set(alias, "_alias_obj", None)
+    with _aliases_lock:
+        _aliases.add(alias)
+    return alias
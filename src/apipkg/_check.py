@@ -0,0 +1,146 @@
+"""check that every export of an apipkg package resolves.
+
+each export (nested namespaces and module aliases included) is resolved in a
+fresh interpreter after the package itself has been imported, so a broken
+export cannot hide behind another one importing its module first. reports
+exports whose module does not import, whose spec names a missing attribute
+and how long each took to resolve.
+
+with ``--static`` the implementation modules are parsed instead of imported,
+see ``_static`` for what that can and cannot verify.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from typing import Any
+from typing import NamedTuple
+
+from ._importgraph import _format_spec
+from ._importgraph import _run_isolated
+from ._registry import _iter_exports
+from ._static import _StaticResolver
+
+# runs in the child: import the package, then resolve one export and report
+_CHECK_SCRIPT = """
+import json
+import sys
+import time
+from importlib import import_module
+pkgname, export, modpath, attrname = sys.argv[1:]
+import_module(pkgname)
+status, error = "ok", None
+start = time.perf_counter()
+try:
+    import_module(modpath)
+except Exception as e:
+    status, error = "import-error", f"{type(e).__name__}: {e}"
+else:
+    try:
+        if attrname:
+            namespace, _, name = export.rpartition(".")
+            getattr(import_module(namespace), name)
+        else:
+            getattr(import_module(export), "__name__")
+    except AttributeError as e:
+        status, error = "broken-spec", f"{type(e).__name__}: {e}"
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+seconds = time.perf_counter() - start
+sys.stdout.write(json.dumps({"status": status, "error": error, "seconds": seconds}))
+"""
+
+
+class ExportCheck(NamedTuple):
+    export: str
+    spec: str
+    # "ok", "import-error", "broken-spec" or "error", and "unverified" for
+    # static checks which could not tell without running code
+    status: str
+    error: str | None
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("ok", "unverified")
+
+
+def _check_export(
+    pkgname: str, export: str, modpath: str, attrname: str | None
+) -> ExportCheck:
+    spec = _format_spec(modpath, attrname)
+    res = _run_isolated(_CHECK_SCRIPT, [pkgname, export, modpath, attrname or ""])
+    try:
+        report = json.loads(res.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        # the interpreter died before reporting, e.g. the package broke
+        lines = res.stderr.strip().splitlines() or [f"exit status {res.returncode}"]
+        return ExportCheck(export, spec, "error", lines[-1], 0.0)
+    return ExportCheck(
+        export, spec, report["status"], report["error"], report["seconds"]
+    )
+
+
+def _static_check(
+    resolver: _StaticResolver, export: str, modpath: str, attrname: str | None
+) -> ExportCheck:
+    start = time.perf_counter()
+    status, error = resolver.resolve(modpath, attrname)
+    seconds = time.perf_counter() - start
+    return ExportCheck(export, _format_spec(modpath, attrname), status, error, seconds)
+
+
+def check(
+    pkgname: str, jobs: int | None = None, static: bool = False
+) -> list[ExportCheck]:
+    """resolve every export of pkgname in isolation, in export order.
+
+    with static the implementation modules are parsed instead of imported,
+    in this process, only the package itself is imported.
+    """
+    exports = list(_iter_exports(import_module(pkgname)))
+    if static:
+        resolver = _StaticResolver()
+        return [_static_check(resolver, *item) for item in exports]
+    with ThreadPoolExecutor(jobs) as pool:
+        return list(pool.map(lambda item: _check_export(pkgname, *item), exports))
+
+
+def render_json(results: list[ExportCheck], seconds: float) -> str:
+    data: dict[str, Any] = {
+        "exports": [r._asdict() for r in results],
+        "failed": sum(not r.ok for r in results),
+        "seconds": seconds,
+    }
+    return json.dumps(data, indent=2)
+
+
+def render_text(results: list[ExportCheck], seconds: float) -> str:
+    lines = []
+    for r in sorted(results, key=lambda r: (r.ok, -r.seconds)):
+        if not r.ok:
+            lines.append(f"FAILED {r.export} ({r.spec}) {r.status}: {r.error}")
+        elif r.error:
+            lines.append(f"?      {r.export} ({r.spec}) {r.status}: {r.error}")
+        else:
+            lines.append(f"ok     {r.export} ({r.spec}) {r.seconds * 1000:.1f} ms")
+    failed = sum(not r.ok for r in results)
+    lines.append(
+        f"{len(results)} exports checked, {failed} failed in {seconds * 1000:.0f} ms"
+    )
+    return "\n".join(lines) + "\n"
+
+
+def main(args: Any) -> int:
+    start = time.perf_counter()
+    results = check(args.package, jobs=args.jobs, static=args.static)
+    seconds = time.perf_counter() - start
+    if args.json:
+        out = render_json(results, seconds)
+    else:
+        out = render_text(results, seconds)
+    sys.stdout.write(out)
+    return 1 if any(not r.ok for r in results) else 0
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from types import ModuleType
+from typing import Any
+from typing import Iterator
+from typing import Mapping
+from typing import MutableMapping
+
+from ._importing import _module_dict
+
+
+class LazyNamespaceDict(MutableMapping[str, Any]):
+    """the ``__dict__`` of an ApiModule created with ``lazy_dict=True``.
+
+    lists pending exports without importing them, an export is resolved
+    when its item is read. ``materialize()`` resolves everything and
+    returns the real namespace dict, like a plain ApiModule ``__dict__``.
+    """
+
+    def __init__(self, mod: ModuleType) -> None:
+        self._mod = mod
+        self._ns = _module_dict(mod)
+
+    def _pending(self) -> list[str]:
+        return [
+            name
+            for name in list(self._ns["__map__"])
+            if name != "__onfirstaccess__" and name not in self._ns
+        ]
+
+    def pending(self) -> list[str]:
+        """names that are listed but not resolved yet"""
+        return self._pending()
+
+    def materialize(self) -> dict[str, Any]:
+        """resolve all pending exports and return the real namespace dict"""
+        for name in self._ns["__all__"]:
+            try:
+                getattr(self._mod, name)
+            except AttributeError:
+                pass
+        return self._ns
+
+    def copy(self) -> dict[str, Any]:
+        """a plain dict of the namespace with everything resolved"""
+        return dict(self.materialize())
+
+    def __or__(self, other: Mapping[str, Any]) -> dict[str, Any]:
+        return {**self.copy(), **other}
+
+    def __ror__(self, other: Mapping[str, Any]) -> dict[str, Any]:
+        return {**other, **self.copy()}
+
+    def __ior__(self, other: Mapping[str, Any]) -> LazyNamespaceDict:
+        self.update(other)
+        return self
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._ns[name]
+        except KeyError:
+            if name == "__onfirstaccess__" or name not in self._ns["__map__"]:
+                raise
+        return getattr(self._mod, name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self._ns[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        exportmap = self._ns["__map__"]
+        if name in self._ns:
+            del self._ns[name]
+            exportmap.pop(name, None)
+        elif name != "__onfirstaccess__" and name in exportmap:
+            del exportmap[name]
+        else:
+            raise KeyError(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ns or (
+            name != "__onfirstaccess__" and name in self._ns["__map__"]
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._ns)
+        yield from self._pending()
+
+    def __len__(self) -> int:
+        return len(self._ns) + len(self._pending())
+
+    def __repr__(self) -> str:
+        return (
+            f"<LazyNamespaceDict {self._ns['__name__']!r}: "
+            f"{len(self._ns)} set, {len(self._pending())} pending>"
+        )
@@ -0,0 +1,234 @@
+"""deferred construction of sub-namespaces and module aliases.
+
+with ``initpkg(..., defer=True)`` nested namespaces and module aliases are
+only built when they are first accessed or imported. until then their parent
+lists them in ``__map__`` as ``(fullname, "")``, resolving that entry builds
+the child, and a meta path finder does so for ``import parent.name``.
+
+with ``initpkg(..., lazy_aliases=True)`` module aliases are served the same
+way, but as the aliased module itself instead of a proxy: it is loaded
+through ``importlib.util.LazyLoader``, so it is only executed on its first
+attribute access and is a plain module from then on.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import weakref
+from importlib import import_module
+from importlib.abc import Loader
+from importlib.abc import MetaPathFinder
+from importlib.machinery import ModuleSpec
+from importlib.util import find_spec
+from importlib.util import LazyLoader
+from importlib.util import module_from_spec
+from types import ModuleType
+from typing import Callable
+from typing import NamedTuple
+
+from ._importing import _module_dict
+from ._importing import _module_import_lock
+from ._importing import importobj
+
+
+class _Deferred(NamedTuple):
+    parent: weakref.ReferenceType[ModuleType]
+    build: Callable[[], ModuleType]
+    # the aliased module for an alias, None for a sub-namespace
+    target: str | None
+    # imports the child instead of build, runs outside the lock
+    load: Callable[[], ModuleType] | None = None
+
+
+# reentrant as building a sub-namespace defers its own children
+_lock = threading.RLock()
+# full module name -> how to build it
+_deferred: dict[str, _Deferred] = {}
+# parent -> the weak reference shared by its entries, whose callback drops
+# them once the parent is gone
+_parents: weakref.WeakKeyDictionary[
+    ModuleType, weakref.ReferenceType[ModuleType]
+] = weakref.WeakKeyDictionary()
+
+
+# lazily loaded modules only load thread-safely since 3.13, before that
+# another thread could see one half-executed
+_LAZY_LOADING = sys.version_info >= (3, 13)
+
+
+def _lazy_module(modpath: str) -> ModuleType:
+    """the module modpath, executed on its first attribute access.
+
+    it is imported right away where lazy loading is not thread-safe, and
+    for modules LazyLoader cannot handle, like namespace packages.
+    """
+    lock = _module_import_lock(modpath) if _LAZY_LOADING else None
+    if lock is not None and modpath not in sys.modules:
+        parentname, _, leaf = modpath.rpartition(".")
+        parent = import_module(parentname) if parentname else None
+        # the import lock of modpath keeps a concurrent import from running
+        # the module as well, it finds the lazy module in sys.modules instead
+        with lock:
+            spec = find_spec(modpath) if modpath not in sys.modules else None
+            if spec is not None and spec.loader is not None:
+                spec.loader = LazyLoader(spec.loader)
+                module = module_from_spec(spec)
+                sys.modules[modpath] = module
+                try:
+                    spec.loader.exec_module(module)
+                except BaseException:
+                    del sys.modules[modpath]
+                    raise
+                if parent is not None:
+                    # bound on the parent package like the import system does
+                    setattr(parent, leaf, module)
+                return module
+    # also waits for a concurrent import of modpath to complete
+    return import_module(modpath)
+
+
+class _DeferredFinder(MetaPathFinder, Loader):
+    """meta path finder and loader building deferred children on import.
+
+    the import system runs exec_module on a placeholder module, which is
+    then replaced in ``sys.modules`` by the real namespace, alias or aliased
+    module. that way the import machinery never sets attributes on an alias
+    proxy, which would forward them to (and import) its target.
+    """
+
+    def find_spec(
+        self, fullname: str, path: object, target: object = None
+    ) -> ModuleSpec | None:
+        if fullname not in _deferred or _lookup(fullname) is None:
+            return None
+        return ModuleSpec(fullname, self)
+
+    def create_module(self, spec: ModuleSpec) -> None:
+        return None
+
+    def exec_module(self, module: ModuleType) -> None:
+        fullname = module.__name__
+        child = _materialize(fullname)
+        if child is None:
+            # built through attribute access since the spec was found
+            parentname, _, leaf = fullname.rpartition(".")
+            parent = sys.modules.get(parentname)
+            child = _module_dict(parent).get(leaf) if parent is not None else None
+            if not isinstance(child, ModuleType):
+                raise ImportError(f"{fullname!r} is no longer deferred", name=fullname)
+        sys.modules[fullname] = child
+
+
+_finder = _DeferredFinder()
+
+
+def _lookup(fullname: str) -> _Deferred | None:
+    """the entry for fullname if its parent is the live module of that name"""
+    with _lock:
+        entry = _deferred.get(fullname)
+    if entry is None:
+        return None
+    parent = entry.parent()
+    if parent is None or sys.modules.get(fullname.rpartition(".")[0]) is not parent:
+        return None
+    return entry
+
+
+def _defer(
+    parent: ModuleType,
+    name: str,
+    build: Callable[[], ModuleType],
+    target: str | None = None,
+    load: Callable[[], ModuleType] | None = None,
+) -> tuple[str, str]:
+    """register the child name of parent, returns its ``__map__`` entry"""
+    ns = _module_dict(parent)
+    fullname = f"{ns['__name__']}.{name}"
+    with _lock:
+        if _finder not in sys.meta_path:
+            sys.meta_path.insert(0, _finder)
+        ref = _parents.get(parent)
+        if ref is None:
+            ref = _parents[parent] = weakref.ref(parent, _forget)
+        _deferred[fullname] = _Deferred(ref, build, target, load)
+    if "__path__" not in ns:
+        # the import system only looks for submodules of packages
+        ns["__path__"] = []
+    return fullname, ""
+
+
+def _forget(ref: weakref.ReferenceType[ModuleType]) -> None:
+    """drop the entries of the parent behind ref, which died"""
+    with _lock:
+        for fullname in [name for name, e in _deferred.items() if e.parent is ref]:
+            del _deferred[fullname]
+
+
+def _undefer(parent: ModuleType) -> None:
+    """drop the entries of parent, which is about to be re-initialized"""
+    with _lock:
+        ref = _parents.get(parent)
+        if ref is not None:
+            _forget(ref)
+
+
+def _materialize(fullname: str) -> ModuleType | None:
+    """build the deferred child fullname, None if it is not deferred (anymore)"""
+    with _lock:
+        entry = _deferred.get(fullname)
+    loaded = entry.load() if entry is not None and entry.load is not None else None
+    with _lock:
+        entry = _deferred.pop(fullname, None)
+        parent = entry.parent() if entry is not None else None
+        if entry is None or parent is None:
+            return None
+        # building only creates module objects, it never imports anything
+        child = entry.build() if loaded is None else loaded
+        if entry.target is None:
+            child.__spec__ = ModuleSpec(fullname, _finder, is_package=True)
+        sys.modules[fullname] = child
+        leaf = fullname.rpartition(".")[2]
+        setattr(parent, leaf, child)
+        _module_dict(parent)["__map__"].pop(leaf, None)
+    return child
+
+
+def _import_deferred(fullname: str) -> object:
+    """resolve the ``__map__`` entry of a deferred child"""
+    child = _materialize(fullname) or sys.modules.get(fullname)
+    return child if child is not None else importobj(fullname, None)
+
+
+def _deferred_target(fullname: str) -> tuple[bool, str | None]:
+    """whether fullname is still deferred, and the module it aliases"""
+    with _lock:
+        entry = _deferred.get(fullname)
+    return entry is not None, entry.target if entry is not None else None
+
+
+def _expand_deferred(mod: ModuleType) -> None:
+    """build the deferred sub-namespaces of mod, to walk its nested exports"""
+    for name, (modpath, attrname) in list(_module_dict(mod)["__map__"].items()):
+        if not attrname and _deferred_target(modpath) == (True, None):
+            _materialize(modpath)
+
+
+def _materialize_all(failed: dict[str, BaseException]) -> list[ModuleType]:
+    """build every deferred child whose parent is alive, for eager loading.
+
+    children whose aliased module cannot be imported are added to failed.
+    """
+    children: list[ModuleType] = []
+    while True:
+        with _lock:
+            pending = sorted(set(_deferred).difference(failed))
+        if not pending:
+            return children
+        for fullname in pending:
+            try:
+                child = _materialize(fullname)
+            except Exception as e:
+                failed[fullname] = e
+                continue
+            if child is not None:
+                children.append(child)
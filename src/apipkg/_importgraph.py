@@ -0,0 +1,165 @@
+"""attribute the imports triggered by each export of an apipkg package.
+
+every export is resolved in a fresh interpreter running with
+``-X importtime`` after the package itself has been imported, so the
+reported modules and timings are exactly what that export drags in.
+"""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from typing import Any
+from typing import NamedTuple
+
+from ._registry import _iter_exports
+
+MARKER = "-- apipkg: package imported --"
+
+# runs in the child: import the package, then resolve one export
+_RESOLVE_SCRIPT = f"""
+import sys
+from importlib import import_module
+pkgname, export, kind = sys.argv[1:]
+import_module(pkgname)
+sys.stderr.write("\\n{MARKER}\\n")
+sys.stderr.flush()
+if kind == "alias":
+    getattr(import_module(export), "__name__")
+else:
+    namespace, _, name = export.rpartition(".")
+    getattr(import_module(namespace), name)
+"""
+
+
+class ImportedModule(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class ExportImports(NamedTuple):
+    export: str
+    spec: str
+    modules: list[ImportedModule]
+    error: str | None
+
+    @property
+    def total_us(self) -> int:
+        return sum(m.self_us for m in self.modules)
+
+
+def _format_spec(modpath: str, attrname: str | None) -> str:
+    """the exportdefs spec of an export, attrname is None for aliases"""
+    return f"{modpath}:{attrname}" if attrname is not None else modpath
+
+
+def _package_exports(pkgname: str) -> list[tuple[str, str]]:
+    """``(export, spec)`` pairs of the pending exports of the package"""
+    mod = import_module(pkgname)
+    return [
+        (name, _format_spec(modpath, attrname))
+        for name, modpath, attrname in _iter_exports(mod)
+    ]
+
+
+def _run_isolated(
+    script: str, args: list[str], importtime: bool = False
+) -> subprocess.CompletedProcess[str]:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    return subprocess.run(
+        cmd + ["-c", script, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+
+def _parse_importtime(stderr: str) -> list[ImportedModule]:
+    modules = []
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1 :]
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        stripped = name.lstrip()
+        modules.append(
+            ImportedModule(
+                stripped.strip(),
+                int(self_us),
+                int(cumulative_us),
+                (len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return modules
+
+
+def _resolve_export(pkgname: str, export: str, spec: str) -> ExportImports:
+    kind = "attr" if ":" in spec else "alias"
+    res = _run_isolated(_RESOLVE_SCRIPT, [pkgname, export, kind], importtime=True)
+    error = None
+    if res.returncode:
+        error = res.stderr.strip().splitlines()[-1]
+    return ExportImports(export, spec, _parse_importtime(res.stderr), error)
+
+
+def importgraph(pkgname: str, jobs: int | None = None) -> list[ExportImports]:
+    """resolve every export of pkgname in isolation and return what it imports"""
+    exports = _package_exports(pkgname)
+    with ThreadPoolExecutor(jobs) as pool:
+        results = pool.map(lambda item: _resolve_export(pkgname, *item), exports)
+        return sorted(results, key=lambda r: r.total_us, reverse=True)
+
+
+def _sharing(results: list[ExportImports]) -> dict[str, list[str]]:
+    shared: dict[str, list[str]] = {}
+    for result in results:
+        for module in result.modules:
+            shared.setdefault(module.name, []).append(result.export)
+    return {name: sorted(exports) for name, exports in sorted(shared.items())}
+
+
+def render_json(results: list[ExportImports]) -> str:
+    data: dict[str, Any] = {
+        "exports": [
+            {
+                "export": r.export,
+                "spec": r.spec,
+                "total_us": r.total_us,
+                "error": r.error,
+                "modules": [m._asdict() for m in r.modules],
+            }
+            for r in results
+        ],
+        "modules": _sharing(results),
+    }
+    return json.dumps(data, indent=2)
+
+
+def render_text(results: list[ExportImports]) -> str:
+    shared = _sharing(results)
+    lines = []
+    for r in results:
+        header = f"{r.export} ({r.spec}): {len(r.modules)} modules, {r.total_us} us"
+        lines.append(header + (f" - {r.error}" if r.error else ""))
+        for m in r.modules:
+            others = len(shared[m.name]) - 1
+            lines.append(
+                f"  {m.self_us:>9} {m.cumulative_us:>9}  {'  ' * m.depth}{m.name}"
+                + (f"  (shared with {others} other export(s))" if others else "")
+            )
+    return "\n".join(lines) + "\n"
+
+
+def main(args: Any) -> int:
+    results = importgraph(args.package, jobs=args.jobs)
+    out = render_json(results) if args.json else render_text(results)
+    sys.stdout.write(out)
+    return 1 if any(r.error for r in results) else 0
@@ -2,6 +2,14 @@ from __future__ import annotations
 
 import os
 import sys
+import threading
+from importlib import _bootstrap
+from types import ModuleType
+from typing import Any
+from typing import cast
+from typing import ContextManager
+
+_MODULE_DICT = ModuleType.__dict__["__dict__"]  # type: ignore
 
 
 def _py_abspath(path: str) -> str:
@@ -15,17 +23,24 @@ def _py_abspath(path: str) -> str:
         return os.path.abspath(path)
 
 
-def distribution_version(name: str) -> str | None:
-    """try to get the version of the named distribution,
-    returns None on failure"""
-    if sys.version_info >= (3, 8):
-        from importlib.metadata import PackageNotFoundError, version
-    else:
-        from importlib_metadata import PackageNotFoundError, version
-    try:
-        return version(name)
-    except PackageNotFoundError:
-        return None
+def _module_dict(mod: ModuleType) -> dict[str, Any]:
+    """the namespace of mod, bypassing ApiModule.__dict__ and alias proxies"""
+    return cast("dict[str, Any]", _MODULE_DICT.__get__(mod))
+
+
+def _parse_importspec(importspec: str, implprefix: str) -> tuple[str, str]:
+    """split ``"modpath:attrname"`` resolving modpaths relative to implprefix,
+    attrname is empty for module aliases.
+
+    modpaths are interned as large export tables repeat a few of them many
+    times over.
+    """
+    parts = importspec.split(":")
+    modpath = parts.pop(0)
+    attrname = parts and parts[0] or ""
+    if modpath[0] == ".":
+        modpath = implprefix + modpath
+    return sys.intern(modpath), attrname
 
 
 def importobj(modpath: str, attrname: str | None) -> object:
@@ -39,3 +54,44 @@ def importobj(modpath: str, attrname: str | None) -> object:
     for x in names:
         retval = getattr(retval, x)
     return retval
+
+
+# the import system's module locks are internals of importlib._bootstrap,
+# each helper below falls back to not knowing about them if they change
+
+
+def _import_lock_owners(ident: int) -> list[int]:
+    """owners of the module locks the import system has thread ident wait for"""
+    blocking_on = getattr(_bootstrap, "_blocking_on", None)
+    locks = blocking_on.get(ident) if blocking_on is not None else None
+    if locks is None:
+        return []
+    # a single lock up to python 3.11, a list of them since
+    if not isinstance(locks, list):
+        locks = [locks]
+    owners = [getattr(lock, "owner", None) for lock in list(locks)]
+    return [owner for owner in owners if owner is not None]
+
+
+def _importing_thread(name: str) -> int | None:
+    """the thread running the import of module name, None if there is none"""
+    module_locks = getattr(_bootstrap, "_module_locks", None)
+    ref = module_locks.get(name) if module_locks is not None else None
+    lock = ref() if ref is not None else None
+    return getattr(lock, "owner", None)
+
+
+def _wait_for_module_lock(name: str) -> None:
+    """wait until another thread running the import of module name is done"""
+    lock_unlock = getattr(_bootstrap, "_lock_unlock_module", None)
+    if lock_unlock is None:
+        return
+    if _importing_thread(name) not in (None, threading.get_ident()):
+        # what the import system does for a module still being initialized
+        lock_unlock(name)
+
+
+def _module_import_lock(name: str) -> ContextManager[object] | None:
+    """the lock the import system holds while it imports module name"""
+    manager = getattr(_bootstrap, "_ModuleLockManager", None)
+    return manager(name) if manager is not None else None
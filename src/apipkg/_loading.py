@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import functools
+import gc
+import sys
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from types import ModuleType
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+
+from ._alias_module import _alias_spec
+from ._alias_module import _alias_target
+from ._alias_module import _AliasModule
+from ._alias_module import _replace_alias
+from ._finder import _expand_deferred
+from ._finder import _materialize_all
+from ._importing import _importing_thread
+from ._importing import _module_dict
+from ._importing import _wait_for_module_lock
+from ._module import _fill_exports
+from ._module import _runfirstaccess
+from ._registry import _is_namespace
+from ._registry import _live_aliases
+from ._registry import _live_namespaces
+from ._registry import _name
+from ._registry import _unregister_namespace
+
+
+def _iter_lazy_names(mod: ModuleType, prefix: str = "") -> Iterator[str]:
+    """yield the dotted names of all unresolved exports below mod"""
+    _expand_deferred(mod)
+    ns = _module_dict(mod)
+    for name in list(ns["__map__"]):
+        if name != "__onfirstaccess__":
+            yield prefix + name
+    for name in ns["__all__"]:
+        child = ns.get(name)
+        if isinstance(child, ModuleType) and _is_namespace(child):
+            yield from _iter_lazy_names(child, f"{prefix}{name}.")
+
+
+def _resolve_dotted(mod: ModuleType, dotted: str) -> object:
+    obj: object = mod
+    for part in dotted.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def resolve_many(
+    mod: ModuleType, names: Iterable[str] | None = None
+) -> dict[str, object]:
+    """resolve names (dotted, relative to mod) in one pass and return them.
+
+    by default all pending exports of mod and its sub-namespaces are
+    resolved. the names are grouped by implementation module so that each
+    module is imported once and exports sharing a target are looked up once.
+    """
+    wanted = list(_iter_lazy_names(mod) if names is None else names)
+    grouped, _ = _group_pending(mod, wanted)
+    for modpath, targets in grouped.items():
+        import_module(modpath)
+        for target, targetnames in targets.items():
+            _fill_exports(target, targetnames)
+    return {dotted: _resolve_dotted(mod, dotted) for dotted in wanted}
+
+
+def _group_pending(
+    mod: ModuleType, wanted: Iterable[str]
+) -> tuple[dict[str, dict[ModuleType, dict[str, str]]], list[str]]:
+    """group the pending exports among the dotted names wanted.
+
+    returns implementation module -> namespace -> export name -> dotted name,
+    in the order of wanted, and the dotted names which are not pending
+    exports of a namespace below mod.
+    """
+    grouped: dict[str, dict[ModuleType, dict[str, str]]] = {}
+    rest = []
+    for dotted in wanted:
+        prefix, _, name = dotted.rpartition(".")
+        try:
+            target = _resolve_dotted(mod, prefix) if prefix else mod
+        except Exception:
+            target = None
+        if isinstance(target, ModuleType) and _is_namespace(target):
+            spec = _module_dict(target)["__map__"].get(name)
+            if spec is not None and name != "__onfirstaccess__":
+                grouped.setdefault(spec[0], {}).setdefault(target, {})[name] = dotted
+                continue
+        rest.append(dotted)
+    return grouped, rest
+
+
+def _load_grouped(
+    modpath: str, targets: dict[ModuleType, dict[str, str]]
+) -> dict[str, BaseException]:
+    """import modpath without holding any once-cell, then fill the exports
+    of the namespaces in targets from it. returns the failures by dotted name.
+
+    only filling takes the once-cells, for a moment each, so loading in the
+    background does not keep other threads from resolving names.
+    """
+    errors: dict[str, BaseException] = {}
+    try:
+        import_module(modpath)
+    except Exception as e:
+        for names in targets.values():
+            errors.update(dict.fromkeys(names.values(), e))
+        return errors
+    for target, names in targets.items():
+        for name, dotted in names.items():
+            try:
+                _fill_exports(target, [name])
+            except Exception as e:
+                errors[dotted] = e
+    return errors
+
+
+def _warmup_target(target: str | ModuleType) -> tuple[ModuleType, list[str] | None]:
+    """the namespace to warm and the export names in it, None for all"""
+    if isinstance(target, ModuleType):
+        return target, None
+    import_module(target.partition(".")[0])
+    if target in sys.modules:
+        return sys.modules[target], None
+    namespace, _, name = target.rpartition(".")
+    return import_module(namespace), [name]
+
+
+def prefork_warmup(
+    targets: Iterable[str | ModuleType] | None = None, gc_freeze: bool = True
+) -> None:
+    """resolve exports in a parent process before it forks workers.
+
+    targets are namespaces (modules or their names) to resolve completely,
+    including their module aliases, or dotted names of single exports like
+    ``"mypkg.sub.name"``. without targets every live namespace and alias is
+    loaded, see eagerload. with gc_freeze the surviving objects are moved
+    to the permanent generation (``gc.freeze()``) so that garbage collections
+    in the children do not write to, and thereby copy, their memory pages.
+    """
+    if targets is None:
+        eagerload()
+    else:
+        for target in targets:
+            mod, names = _warmup_target(target)
+            resolve_many(mod, names)
+            if names is None:
+                prefix = _name(mod) + "."
+                for alias in _live_aliases():
+                    if _name(alias).startswith(prefix):
+                        getattr(alias, "__name__", None)
+    if gc_freeze and hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
+
+
+# what the two backends add to a namespace on top of a plain module, besides
+# the private ApiModule attributes set for enabled options
+_LAZY_MACHINERY = ("__map__", "__getattr__", "__dir__")
+
+
+def freeze(mod: ModuleType) -> ModuleType:
+    """resolve everything in mod and turn it into a plain module in place.
+
+    sub-namespaces are frozen as well and module aliases below mod are
+    replaced by the real modules, in ``sys.modules`` and in their namespace.
+    the module object stays the same so existing references keep working,
+    it just no longer has any lazy lookup machinery.
+    """
+    if not _is_namespace(mod):
+        raise TypeError(f"{mod!r} is not an apipkg namespace")
+    ns = _module_dict(mod)
+    if "__onfirstaccess__" in ns["__map__"]:
+        _runfirstaccess(_name(mod), ns["__map__"])
+    resolve_many(mod, [name for name in _iter_lazy_names(mod) if "." not in name])
+    for name in ns["__all__"]:
+        child = ns.get(name)
+        if isinstance(child, ModuleType) and _is_namespace(child):
+            freeze(child)
+    prefix = _name(mod) + "."
+    for alias in _live_aliases():
+        if _name(alias).startswith(prefix):
+            target = _alias_target(alias)
+            if isinstance(target, ModuleType):
+                _replace_alias(alias, mod, target)
+
+    doc = mod.__doc__
+    for name in [*_LAZY_MACHINERY, *(n for n in ns if n.startswith("_ApiModule__"))]:
+        ns.pop(name, None)
+    if type(mod) is not ModuleType:
+        mod.__class__ = ModuleType
+    ns["__doc__"] = doc
+    _unregister_namespace(mod)
+    return mod
+
+
+def replay(mod: ModuleType, exports: Iterable[str], background: bool = False) -> None:
+    """resolve the exports below mod listed in exports, in that order.
+
+    exports are dotted names including the namespace, as recorded in a
+    manifest; names of other packages are skipped. with background the
+    names are resolved on a daemon thread once the package is imported.
+    """
+    prefix = _name(mod) + "."
+    names = [export[len(prefix) :] for export in exports if export.startswith(prefix)]
+
+    def run() -> None:
+        if background:
+            _wait_for_import(_name(mod))
+        # the manifest may be stale, such names then raise when they are
+        # actually accessed, replaying must not break the import
+        grouped, rest = _group_pending(mod, names)
+        for modpath, targets in grouped.items():
+            _load_grouped(modpath, targets)
+        for name in rest:
+            try:
+                _resolve_dotted(mod, name)
+            except Exception:
+                pass
+
+    if not names:
+        return
+    if background:
+        thread = threading.Thread(
+            target=run, name=f"apipkg-replay-{_name(mod)}", daemon=True
+        )
+        thread.start()
+    else:
+        run()
+
+
+def _wait_for_import(name: str) -> None:
+    # a package calling initpkg from its __init__ is still being imported,
+    # resolving its exports needs that import to finish first. waiting on the
+    # import lock here, before taking any once-cell, avoids deadlocking with
+    # code in the package __init__ that accesses lazy names. initpkg replaces
+    # the __spec__ (and its _initializing flag) of an ApiModule package, the
+    # module lock held by the import system tells for both backends
+    _wait_for_module_lock(name)
+
+
+def eagerload(max_workers: int | None = None) -> None:
+    """resolve every export of every live apipkg namespace and module alias.
+
+    the distinct implementation modules are imported concurrently on a
+    thread pool first (on the calling thread while one of their packages is
+    still being imported), the namespaces are then filled from them. if some
+    imports fail everything else is still loaded and a single ImportError
+    listing the failures, sorted by module, is raised at the end.
+    """
+    failed: dict[str, BaseException] = {}
+    # modules served for lazy_aliases, which execute on first attribute access
+    lazy = [
+        child
+        for child in _materialize_all(failed)
+        if not _is_namespace(child) and not isinstance(child, _AliasModule)
+    ]
+    namespaces = _live_namespaces()
+    aliases = _live_aliases()
+    modpaths = {_alias_spec(alias)[0] for alias in aliases}
+    for mod in namespaces:
+        modpaths.update(
+            modpath
+            for name, (modpath, _) in list(_module_dict(mod)["__map__"].items())
+            if name != "__onfirstaccess__"
+        )
+
+    packages = {_name(mod) for mod in namespaces}
+    for modpath in modpaths:
+        parts = modpath.split(".")
+        packages.update(".".join(parts[:i]) for i in range(1, len(parts)))
+    if any(_importing_thread(name) is not None for name in packages):
+        # e.g. initpkg(..., eager=True) in a package __init__, the pool threads
+        # would wait for the import of the package, which waits for them
+        for modpath in sorted(modpaths):
+            try:
+                import_module(modpath)
+            except Exception as e:
+                failed[modpath] = e
+    else:
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="apipkg-eager") as pool:
+            futures = {
+                modpath: pool.submit(import_module, modpath) for modpath in modpaths
+            }
+        for modpath, future in sorted(futures.items()):
+            error = future.exception()
+            if error is not None:
+                failed[modpath] = error
+
+    for mod in namespaces:
+        exportmap = _module_dict(mod)["__map__"]
+        if "__onfirstaccess__" in exportmap:
+            hasattr(mod, "__onfirstaccess__")
+        for name, (modpath, _) in list(exportmap.items()):
+            if modpath in failed:
+                continue
+            try:
+                getattr(mod, name)
+            except AttributeError:
+                pass
+    for alias in aliases:
+        if _alias_spec(alias)[0] not in failed:
+            # any attribute access makes the proxy resolve its target
+            getattr(alias, "__name__", None)
+    for module in lazy:
+        try:
+            getattr(module, "__name__", None)
+        except Exception as e:
+            failed[_module_dict(module)["__name__"]] = e
+
+    if failed:
+        first = failed[min(failed)]
+        details = "".join(
+            f"\n  {modpath}: {e!r}" for modpath, e in sorted(failed.items())
+        )
+        raise ImportError(
+            f"eager loading failed for {len(failed)} module(s):{details}"
+        ) from first
+
+
+def prefetch(
+    mod: ModuleType,
+    order: Iterable[str] = (),
+    max_workers: int = 4,
+) -> Future[dict[str, BaseException]]:
+    """resolve the exports of mod (and its sub-namespaces) on a thread pool.
+
+    names listed in order (dotted, relative to mod) are resolved first, the
+    remaining exports follow in definition order. accessing a name while it
+    is being prefetched waits for that resolution instead of importing again.
+
+    returns a future which completes once everything has been resolved, its
+    result maps the names that failed to resolve to their exceptions.
+    """
+    names = list(dict.fromkeys([*order, *_iter_lazy_names(mod)]))
+    done: Future[dict[str, BaseException]] = Future()
+    errors: dict[str, BaseException] = {}
+    if not names:
+        done.set_result(errors)
+        return done
+    # one task per implementation module, in the order of its first name,
+    # and one per name that is not a pending export (e.g. below an alias)
+    grouped, rest = _group_pending(mod, names)
+    tasks: list[Callable[[], dict[str, BaseException]]] = [
+        functools.partial(_load_grouped, modpath, targets)
+        for modpath, targets in grouped.items()
+    ]
+    tasks += [functools.partial(_resolve_name, mod, name) for name in rest]
+    pending = [len(tasks)]
+    lock = threading.Lock()
+
+    def run(task: Callable[[], dict[str, BaseException]]) -> None:
+        failed: dict[str, BaseException] = {}
+        try:
+            _wait_for_import(mod.__name__)
+            failed = task()
+        finally:
+            with lock:
+                errors.update(failed)
+                pending[0] -= 1
+                finished = not pending[0]
+            if finished:
+                done.set_result(dict(sorted(errors.items())))
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix=f"apipkg-prefetch-{mod.__name__}"
+    )
+    for task in tasks:
+        executor.submit(run, task)
+    executor.shutdown(wait=False)
+    return done
+
+
+def _resolve_name(mod: ModuleType, name: str) -> dict[str, BaseException]:
+    try:
+        _resolve_dotted(mod, name)
+    except Exception as e:
+        return {name: e}
+    return {}
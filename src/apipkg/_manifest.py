@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+from typing import NamedTuple
+from typing import Union
+
+RECORD_ENV = "APIPKG_RECORD"
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+class AccessRecord(NamedTuple):
+    """a lazy export that was resolved, and how many first lookups asked for it.
+
+    only lookups that find the export still pending are counted, so
+    first_lookups is 1 unless several threads looked it up concurrently
+    before it was resolved. later lookups read the module namespace and are
+    not seen by the recorder.
+    """
+
+    export: str
+    first_lookups: int
+
+
+class _AccessRecorder:
+    def __init__(self) -> None:
+        # dotted export -> first lookups, in first access order
+        self.counts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def record(self, namespace: str, name: str) -> None:
+        export = f"{namespace}.{name}"
+        with self.lock:
+            self.counts[export] = self.counts.get(export, 0) + 1
+
+
+_recorder: _AccessRecorder | None = None
+
+
+def record_accesses(enabled: bool = True) -> None:
+    """start (or stop) recording which lazy exports get resolved.
+
+    starting a recording discards the records of a previous one, the
+    ``APIPKG_RECORD`` environment variable starts it at import time and
+    writes the manifest to the path it names at exit.
+    """
+    global _recorder
+    _recorder = _AccessRecorder() if enabled else None
+
+
+def access_records() -> list[AccessRecord]:
+    """return the recorded exports in first access order"""
+    if _recorder is None:
+        return []
+    with _recorder.lock:
+        return [AccessRecord(*item) for item in _recorder.counts.items()]
+
+
+def write_manifest(path: PathLike) -> None:
+    """write the recorded exports to path, for ``initpkg(..., replay=path)``"""
+    data = {"exports": [record._asdict() for record in access_records()]}
+    with open(path, "w") as fp:
+        json.dump(data, fp, indent=2)
+
+
+def read_manifest(path: PathLike) -> list[str]:
+    """the dotted exports listed in a manifest, a missing file lists none"""
+    try:
+        with open(path) as fp:
+            data = json.load(fp)
+    except FileNotFoundError:
+        return []
+    return [entry["export"] for entry in data["exports"]]
+
+
+def _configure_from_env() -> None:
+    target = os.environ.get(RECORD_ENV)
+    if target:
+        record_accesses()
+        atexit.register(write_manifest, target)
+
+
+_configure_from_env()
@@ -0,0 +1,123 @@
+"""cached distribution versions.
+
+``importlib.metadata.version`` scans every ``sys.path`` entry on each call.
+instead the ``*.dist-info``/``*.egg-info`` directories on ``sys.path`` are
+indexed by normalized distribution name once, and the index is rebuilt when
+the modification time of a ``sys.path`` entry (or the path itself) changes.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+from typing import Tuple
+
+_METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+# (sys.path entry, its mtime or None) for every entry the index was built from
+_IndexKey = Tuple[Tuple[str, "int | None"], ...]
+
+
+def _normalize(name: str) -> str:
+    """the PEP 503 normalized form of a distribution name"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _mtime(entry: str) -> int | None:
+    try:
+        return os.stat(entry or ".").st_mtime_ns
+    except OSError:
+        return None
+
+
+def _index_key() -> _IndexKey:
+    return tuple((entry, _mtime(entry)) for entry in sys.path if isinstance(entry, str))
+
+
+def _scan(key: _IndexKey) -> dict[str, str]:
+    """normalized name -> metadata directory, the first on sys.path wins"""
+    paths: dict[str, str] = {}
+    for entry, mtime in key:
+        if mtime is None:
+            continue
+        try:
+            names = os.listdir(entry or ".")
+        except OSError:
+            # zip files and the like, versions from there use the slow path
+            continue
+        for filename in names:
+            if filename.endswith(_METADATA_SUFFIXES):
+                # name-version.dist-info, name-version-pyX.Y.egg-info, name.egg-info
+                distname = filename.rpartition(".")[0].partition("-")[0]
+                paths.setdefault(_normalize(distname), os.path.join(entry, filename))
+    return paths
+
+
+class _DistributionIndex:
+    def __init__(self, key: _IndexKey) -> None:
+        self.key = key
+        self.paths = _scan(key)
+        # normalized name -> version, including the misses
+        self.versions: dict[str, str | None] = {}
+
+
+_lock = threading.Lock()
+_index: _DistributionIndex | None = None
+
+
+def _lookup_version(path: str | None, name: str) -> str | None:
+    if sys.version_info >= (3, 8):
+        from importlib.metadata import Distribution, PackageNotFoundError, version
+    else:
+        from importlib_metadata import Distribution, PackageNotFoundError, version
+    if path is not None:
+        found = Distribution.at(path).version
+        if found:
+            return found
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def distribution_version(name: str) -> str | None:
+    """try to get the version of the named distribution,
+    returns None on failure. results are cached until ``sys.path`` or the
+    contents of one of its directories change"""
+    global _index
+    key = _index_key()
+    normalized = _normalize(name)
+    with _lock:
+        if _index is None or _index.key != key:
+            _index = _DistributionIndex(key)
+        index = _index
+        try:
+            return index.versions[normalized]
+        except KeyError:
+            pass
+        found = _lookup_version(index.paths.get(normalized), name)
+        index.versions[normalized] = found
+        return found
+
+
+class _Versions:
+    """``versions.<normalized name>`` is the version of that distribution"""
+
+    def __getattr__(self, name: str) -> str | None:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return distribution_version(name)
+
+
+versions = _Versions()
+
+
+def lazy_version(name: str) -> str:
+    """an exportdefs spec for the version of the named distribution.
+
+    ``initpkg(__name__, {"__version__": apipkg.lazy_version("mydist")})``
+    looks the version up on first access of ``__version__`` instead of
+    while the package is imported.
+    """
+    return f"{__name__}:versions.{_normalize(name)}"
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
+import functools
 import sys
-import threading
 from types import ModuleType
 from typing import Any
 from typing import Callable
@@ -9,10 +9,24 @@ from typing import cast
 from typing import Iterable
 
 from ._alias_module import AliasModule
+from ._dictview import LazyNamespaceDict
+from ._finder import _defer
+from ._finder import _import_deferred
+from ._finder import _lazy_module
+from ._finder import _undefer
+from ._importing import _module_dict
+from ._importing import _parse_importspec
 from ._importing import _py_abspath
 from ._importing import importobj
+from ._registry import _register_namespace
+from ._syncronized import _resolving
 from ._syncronized import _synchronized
 
+# marks an __onfirstaccess__ hook that is currently running
+_FIRSTACCESS_RUNNING = ("", "")
+# where ApiModule keeps the lazy __dict__ view (self.__dictview)
+_DICTVIEW = "_ApiModule__dictview"
+
 
 class ApiModule(ModuleType):
     """the magical lazy-loading module standing"""
@@ -22,7 +36,7 @@ class ApiModule(ModuleType):
             return self.__doc
         except AttributeError:
             if "__doc__" in self.__map__:
-                return cast(str, self.__makeattr("__doc__"))
+                return cast(str, _lazy_getattr(self, "__doc__"))
             else:
                 return None
 
@@ -31,6 +45,9 @@ class ApiModule(ModuleType):
 
     __doc__ = property(__docget, __docset)  # type: ignore
     __map__: dict[str, tuple[str, str]]
+    # only set on the instance with lazy_dict and batch respectively
+    __dictview: LazyNamespaceDict | None = None
+    __batch = False
 
     def __init__(
         self,
@@ -38,8 +55,16 @@ class ApiModule(ModuleType):
         importspec: dict[str, Any],
         implprefix: str | None = None,
         attr: dict[str, Any] | None = None,
+        *,
+        replace_aliases: bool = False,
+        lazy_dict: bool = False,
+        batch: bool = False,
+        defer: bool = False,
+        lazy_aliases: bool = False,
     ) -> None:
         super().__init__(name)
+        if batch:
+            self.__batch = batch
         self.__name__ = name
         self.__all__ = [x for x in importspec if x != "__onfirstaccess__"]
         self.__map__ = {}
@@ -47,27 +72,30 @@ class ApiModule(ModuleType):
         if attr:
             for name, val in attr.items():
                 setattr(self, name, val)
-        for name, importspec in importspec.items():
-            if isinstance(importspec, dict):
-                subname = f"{self.__name__}.{name}"
-                apimod = ApiModule(subname, importspec, implprefix)
-                sys.modules[subname] = apimod
-                setattr(self, name, apimod)
-            else:
-                parts = importspec.split(":")
-                modpath = parts.pop(0)
-                attrname = parts and parts[0] or ""
-                if modpath[0] == ".":
-                    modpath = implprefix + modpath
-
-                if not attrname:
-                    subname = f"{self.__name__}.{name}"
-                    apimod = AliasModule(subname, modpath)
-                    sys.modules[subname] = apimod
-                    if "." not in name:
-                        setattr(self, name, apimod)
-                else:
-                    self.__map__[name] = (modpath, attrname)
+        make_namespace = functools.partial(
+            ApiModule,
+            implprefix=implprefix,
+            replace_aliases=replace_aliases,
+            lazy_dict=lazy_dict,
+            batch=batch,
+            defer=defer,
+            lazy_aliases=lazy_aliases,
+        )
+        _build_exports(
+            self,
+            self.__map__,
+            importspec,
+            cast(str, implprefix),
+            make_namespace,
+            replace_aliases=replace_aliases,
+            defer=defer,
+            lazy_aliases=lazy_aliases,
+        )
+        if lazy_dict:
+            self.__dictview = LazyNamespaceDict(self)
+        _register_namespace(
+            self, len(self.__map__) - ("__onfirstaccess__" in self.__map__)
+        )
 
     def __repr__(self):
         repr_list = [f"<ApiModule {self.__name__!r}"]
@@ -78,64 +106,193 @@ class ApiModule(ModuleType):
         repr_list.append(">")
         return "".join(repr_list)
 
-    @_synchronized
-    def __makeattr(self, name, isgetattr=False):
-        """lazily compute value for name or raise AttributeError if unknown."""
-        target = None
-        if "__onfirstaccess__" in self.__map__:
-            target = self.__map__.pop("__onfirstaccess__")
-            fn = cast(Callable[[], None], importobj(*target))
-            fn()
-        try:
-            modpath, attrname = self.__map__[name]
-        except KeyError:
-            # __getattr__ is called when the attribute does not exist, but it may have
-            # been set by the onfirstaccess call above. Infinite recursion is not
-            # possible as __onfirstaccess__ is removed before the call (unless the call
-            # adds __onfirstaccess__ to __map__ explicitly, which is not our problem)
-            if target is not None and name != "__onfirstaccess__":
-                return getattr(self, name)
-            # Attribute may also have been set during a concurrent call to __getattr__
-            # which executed after this call was already waiting on the lock. Check
-            # for a recently set attribute while avoiding infinite recursion:
-            # * Don't call __getattribute__ if __makeattr was called from a data
-            #   descriptor such as the __doc__ or __dict__ properties, since data
-            #   descriptors are called as part of object.__getattribute__
-            # * Only call __getattribute__ if there is a possibility something has set
-            #   the attribute we're looking for since __getattr__ was called
-            if threading is not None and isgetattr:
-                return super().__getattribute__(name)
-            raise AttributeError(name)
-        else:
-            result = importobj(modpath, attrname)
-            setattr(self, name, result)
-            # in a recursive-import situation a double-del can happen
-            self.__map__.pop(name, None)
-            return result
-
     def __getattr__(self, name):
-        return self.__makeattr(name, isgetattr=True)
+        value = _lazy_getattr(self, name, self.__batch)
+        if value is _MISSING:
+            raise AttributeError(name)
+        return value
 
     def __dir__(self) -> Iterable[str]:
-        yield from super().__dir__()
+        ns = _module_dict(self)
+        if ns.get(_DICTVIEW) is None:
+            yield from super().__dir__()
+        else:
+            # ModuleType.__dir__ insists on __dict__ being a real dict
+            yield from list(ns)
         yield from self.__map__
 
     @property
-    def __dict__(self) -> dict[str, Any]:  # type: ignore
-        # force all the content of the module
-        # to be loaded when __dict__ is read
-        dictdescr = ModuleType.__dict__["__dict__"]  # type: ignore
-        ns: dict[str, Any] = dictdescr.__get__(self)
+    def __dict__(self) -> dict[str, Any] | LazyNamespaceDict:  # type: ignore
+        ns: dict[str, Any] = _module_dict(self)
         if ns is not None:
+            view = ns.get(_DICTVIEW)
+            if view is not None:
+                return cast(LazyNamespaceDict, view)
+            # force all the content of the module
+            # to be loaded when __dict__ is read
             hasattr(self, "some")
             for name in self.__all__:
                 try:
-                    self.__makeattr(name)
+                    _resolve(self, name)
                 except AttributeError:
                     pass
         return ns
 
 
+def _build_exports(
+    mod: ModuleType,
+    exportmap: dict[str, tuple[str, str]],
+    importspec: dict[str, Any],
+    implprefix: str,
+    make_namespace: Callable[[str, dict[str, Any]], ModuleType],
+    replace_aliases: bool = False,
+    defer: bool = False,
+    lazy_aliases: bool = False,
+) -> None:
+    """fill the export table of the namespace mod from importspec.
+
+    nested namespaces, built by ``make_namespace(fullname, importspec)``,
+    and module aliases are set on mod right away or deferred, attribute
+    exports only go to exportmap. shared by both initpkg backends.
+    """
+    modname = _module_dict(mod)["__name__"]
+    for name, spec in importspec.items():
+        subname = f"{modname}.{name}"
+        if isinstance(spec, dict):
+            build = functools.partial(make_namespace, subname, spec)
+            if defer:
+                exportmap[name] = _defer(mod, name, build)
+                continue
+            sub = build()
+            sys.modules[subname] = sub
+            setattr(mod, name, sub)
+            continue
+        modpath, attrname = _parse_importspec(spec, implprefix)
+        if attrname:
+            # share the key string when attrname repeats the export name
+            exportmap[name] = (modpath, name if attrname == name else attrname)
+            continue
+        if lazy_aliases and "." not in name:
+            load = functools.partial(_lazy_module, modpath)
+            exportmap[name] = _defer(mod, name, load, modpath, load)
+            continue
+        build = functools.partial(
+            AliasModule, subname, modpath, parent=mod if replace_aliases else None
+        )
+        if defer and "." not in name:
+            exportmap[name] = _defer(mod, name, build, modpath)
+            continue
+        alias = build()
+        sys.modules[subname] = alias
+        if "." not in name:
+            setattr(mod, name, alias)
+
+
+# returned by _lazy_getattr for names a namespace does not have
+_MISSING = object()
+
+
+def _lazy_getattr(mod: ModuleType, name: str, batch: bool = False) -> object:
+    """the value of name for the ``__getattr__`` of the namespace mod,
+    resolving it when it is a pending export, _MISSING if mod lacks it"""
+    ns = _module_dict(mod)
+    exportmap = ns["__map__"]
+    if "__onfirstaccess__" in exportmap:
+        if _runfirstaccess(ns["__name__"], exportmap):
+            # the hook may have set name
+            return getattr(mod, name)
+    if name not in exportmap:
+        # nothing to resolve, answer the miss without taking a cell. a
+        # concurrent resolution sets the attribute before leaving the map
+        return ns.get(name, _MISSING)
+    spec = exportmap.get(name)
+    result = _resolve(mod, name)
+    if batch and spec is not None:
+        # the implementation module is imported now, fill its siblings
+        _fill_siblings(mod, spec[0])
+    return result
+
+
+@_synchronized
+def _resolve(mod: ModuleType, name: str) -> object:
+    """import the pending export name and set it on the namespace mod"""
+    exportmap = _module_dict(mod)["__map__"]
+    spec = exportmap.get(name)
+    if spec is None:
+        # resolved by a concurrent call while we waited for the cell, looked
+        # up without going through __getattr__ again
+        return object.__getattribute__(mod, name)
+    modpath, attrname = spec
+    result = importobj(modpath, attrname) if attrname else _import_deferred(modpath)
+    setattr(mod, name, result)
+    # in a recursive-import situation a double-del can happen
+    exportmap.pop(name, None)
+    return result
+
+
+def _runfirstaccess(namespace: str, exportmap: dict[str, tuple[str, str]]) -> bool:
+    """call the __onfirstaccess__ hook once, return True if this call ran it.
+
+    the entry stays in the map while the hook runs so concurrent accessors
+    wait for it to finish, reentrant calls from the hook itself skip it.
+    """
+    with _resolving(namespace, "__onfirstaccess__"):
+        target = exportmap.get("__onfirstaccess__")
+        if target is None or target is _FIRSTACCESS_RUNNING:
+            return False
+        exportmap["__onfirstaccess__"] = _FIRSTACCESS_RUNNING
+        try:
+            fn = cast(Callable[[], None], importobj(*target))
+            fn()
+        finally:
+            exportmap.pop("__onfirstaccess__", None)
+        return True
+
+
+def _fill_exports(mod: ModuleType, names: Iterable[str], strict: bool = True) -> None:
+    """resolve the pending names of mod, each distinct (modpath, attrname)
+    is looked up only once and set on every name exporting it.
+
+    failures propagate when strict, otherwise those names stay pending so
+    accessing them raises as usual.
+    """
+    ns = _module_dict(mod)
+    namespace = ns["__name__"]
+    exportmap = ns["__map__"]
+    if "__onfirstaccess__" in exportmap:
+        _runfirstaccess(namespace, exportmap)
+    values: dict[tuple[str, str], object] = {}
+    failed = set()
+    for name in names:
+        spec = exportmap.get(name)
+        if spec is None or name == "__onfirstaccess__" or spec in failed:
+            continue
+        with _resolving(namespace, name):
+            # resolved (or redefined) concurrently while we waited for the cell
+            if exportmap.get(name) != spec:
+                continue
+            if spec not in values:
+                try:
+                    values[spec] = (
+                        importobj(*spec) if spec[1] else _import_deferred(spec[0])
+                    )
+                except Exception:
+                    if strict:
+                        raise
+                    failed.add(spec)
+                    continue
+            setattr(mod, name, values[spec])
+            exportmap.pop(name, None)
+
+
+def _fill_siblings(mod: ModuleType, modpath: str) -> None:
+    """resolve the pending exports of mod coming from the imported modpath"""
+    exportmap = _module_dict(mod)["__map__"]
+    siblings = [name for name, spec in list(exportmap.items()) if spec[0] == modpath]
+    if siblings:
+        _fill_exports(mod, siblings, strict=False)
+
+
 _PRESERVED_MODULE_ATTRS = {
     "__file__",
     "__version__",
@@ -148,7 +305,38 @@ _PRESERVED_MODULE_ATTRS = {
 }
 
 
-def _initpkg(mod: ModuleType | None, pkgname, exportdefs, attr=None) -> ApiModule:
+def _clear_module(mod: ModuleType, exportdefs: dict[str, Any]) -> None:
+    """strip an existing package module down to the attributes initpkg keeps"""
+    f = getattr(mod, "__file__", None)
+    if f:
+        f = _py_abspath(f)
+    mod.__file__ = f
+    if hasattr(mod, "__path__"):
+        mod.__path__ = [_py_abspath(p) for p in mod.__path__]
+    for name in ("__doc__", "__version__"):
+        # a lazy export must not be shadowed by the value it replaces
+        if name in exportdefs and hasattr(mod, name):
+            delattr(mod, name)
+    ns = _module_dict(mod)
+    for name in dir(mod):
+        # pending exports are listed by dir() but not set yet
+        if name not in _PRESERVED_MODULE_ATTRS and name in ns:
+            delattr(mod, name)
+    # children deferred by the previous exports must not be built anymore
+    _undefer(mod)
+
+
+def _initpkg(
+    mod: ModuleType | None,
+    pkgname,
+    exportdefs,
+    attr=None,
+    replace_aliases=False,
+    lazy_dict=False,
+    batch=False,
+    defer=False,
+    lazy_aliases=False,
+) -> ApiModule:
     """Helper for initpkg.
 
     Python 3.3+ uses finer grained locking for imports, and checks sys.modules before
@@ -161,24 +349,34 @@ def _initpkg(mod: ModuleType | None, pkgname, exportdefs, attr=None) -> ApiModul
     if mod is None:
         d = {"__file__": None, "__spec__": None}
         d.update(attr)
-        mod = ApiModule(pkgname, exportdefs, implprefix=pkgname, attr=d)
+        mod = ApiModule(
+            pkgname,
+            exportdefs,
+            implprefix=pkgname,
+            attr=d,
+            replace_aliases=replace_aliases,
+            lazy_dict=lazy_dict,
+            batch=batch,
+            defer=defer,
+            lazy_aliases=lazy_aliases,
+        )
         sys.modules[pkgname] = mod
         return mod
     else:
-        f = getattr(mod, "__file__", None)
-        if f:
-            f = _py_abspath(f)
-        mod.__file__ = f
-        if hasattr(mod, "__path__"):
-            mod.__path__ = [_py_abspath(p) for p in mod.__path__]
-        if "__doc__" in exportdefs and hasattr(mod, "__doc__"):
-            del mod.__doc__
-        for name in dir(mod):
-            if name not in _PRESERVED_MODULE_ATTRS:
-                delattr(mod, name)
-
+        _clear_module(mod, exportdefs)
         # Updating class of existing module as per importlib.util.LazyLoader
         mod.__class__ = ApiModule
         apimod = cast(ApiModule, mod)
-        ApiModule.__init__(apimod, pkgname, exportdefs, implprefix=pkgname, attr=attr)
+        ApiModule.__init__(
+            apimod,
+            pkgname,
+            exportdefs,
+            implprefix=pkgname,
+            attr=attr,
+            replace_aliases=replace_aliases,
+            lazy_dict=lazy_dict,
+            batch=batch,
+            defer=defer,
+            lazy_aliases=lazy_aliases,
+        )
         return apimod
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import functools
+import sys
+from types import ModuleType
+from typing import Any
+
+from ._importing import _module_dict
+from ._importing import importobj
+from ._module import _build_exports
+from ._module import _clear_module
+from ._module import _lazy_getattr
+from ._module import _MISSING
+from ._registry import _register_namespace
+
+
+class _Resolver:
+    """resolves the lazy exports of a namespace using a PEP 562 __getattr__"""
+
+    def __init__(self, mod: ModuleType, batch: bool = False):
+        self.batch = batch
+        self.mod = mod
+        self.ns = _module_dict(mod)
+
+    def getattr(self, name: str) -> object:
+        value = _lazy_getattr(self.mod, name, self.batch)
+        if value is _MISSING:
+            raise AttributeError(
+                f"module {self.ns['__name__']!r} has no attribute {name!r}"
+            )
+        return value
+
+    def dir(self) -> list[str]:
+        return sorted({*self.ns, *self.ns["__map__"]})
+
+
+def _install(
+    mod: ModuleType,
+    importspec: dict[str, Any],
+    implprefix: str,
+    replace_aliases: bool = False,
+    batch: bool = False,
+    defer: bool = False,
+    lazy_aliases: bool = False,
+) -> None:
+    """make mod lazily provide importspec through module __getattr__/__dir__"""
+    ns = _module_dict(mod)
+    ns["__all__"] = [x for x in importspec if x != "__onfirstaccess__"]
+    ns["__implprefix__"] = implprefix
+    exportmap: dict[str, tuple[str, str]] = {}
+    ns["__map__"] = exportmap
+    make_namespace = functools.partial(
+        _build_namespace,
+        implprefix=implprefix,
+        replace_aliases=replace_aliases,
+        batch=batch,
+        defer=defer,
+        lazy_aliases=lazy_aliases,
+    )
+    _build_exports(
+        mod,
+        exportmap,
+        importspec,
+        implprefix,
+        make_namespace,
+        replace_aliases=replace_aliases,
+        defer=defer,
+        lazy_aliases=lazy_aliases,
+    )
+    spec = exportmap.pop("__doc__", None)
+    if spec is not None:
+        # modules always have a __doc__, __getattr__ would never see it
+        ns["__doc__"] = importobj(*spec)
+    resolver = _Resolver(mod, batch)
+    ns["__getattr__"] = resolver.getattr
+    ns["__dir__"] = resolver.dir
+    _register_namespace(mod, len(exportmap) - ("__onfirstaccess__" in exportmap))
+
+
+def _build_namespace(
+    name: str,
+    importspec: dict[str, Any],
+    implprefix: str,
+    replace_aliases: bool,
+    batch: bool,
+    defer: bool,
+    lazy_aliases: bool,
+) -> ModuleType:
+    """a new plain module lazily providing importspec"""
+    sub = ModuleType(name)
+    _install(sub, importspec, implprefix, replace_aliases, batch, defer, lazy_aliases)
+    return sub
+
+
+def _initpkg_pep562(
+    mod: ModuleType | None,
+    pkgname: str,
+    exportdefs: dict[str, Any],
+    attr: dict[str, Any],
+    replace_aliases: bool = False,
+    batch: bool = False,
+    defer: bool = False,
+    lazy_aliases: bool = False,
+) -> ModuleType:
+    """Helper for initpkg(..., backend="pep562").
+
+    keeps the package a plain module and installs a module level __getattr__
+    and __dir__ (PEP 562) instead of switching its class to ApiModule.
+    """
+    if mod is None:
+        mod = ModuleType(pkgname)
+        mod.__file__ = None  # type: ignore[assignment]
+        sys.modules[pkgname] = mod
+    else:
+        _clear_module(mod, exportdefs)
+        mod.__name__ = pkgname
+    for name, val in attr.items():
+        setattr(mod, name, val)
+    _install(mod, exportdefs, pkgname, replace_aliases, batch, defer, lazy_aliases)
+    return mod
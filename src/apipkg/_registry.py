@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from types import ModuleType
+from typing import cast
+from typing import Iterator
+from typing import NamedTuple
+
+from . import _alias_module
+from ._alias_module import _alias_resolved
+from ._alias_module import _alias_spec
+from ._alias_module import _aliases
+from ._finder import _deferred_target
+from ._finder import _expand_deferred
+from ._importing import _module_dict
+
+_lock = threading.Lock()
+# lazy namespace (either backend) -> number of lazy exports it was created with
+_namespaces: weakref.WeakKeyDictionary[ModuleType, int] = weakref.WeakKeyDictionary()
+
+
+class NamespaceStatus(NamedTuple):
+    """resolution progress of a namespace or module alias"""
+
+    name: str
+    kind: str
+    pending: int
+    resolved: int
+
+
+def _register_namespace(mod: ModuleType, exports: int) -> None:
+    with _lock:
+        _namespaces[mod] = exports
+
+
+def _unregister_namespace(mod: ModuleType) -> None:
+    with _lock:
+        _namespaces.pop(mod, None)
+
+
+def _is_namespace(obj: ModuleType) -> bool:
+    """whether obj is a lazy namespace of either initpkg backend"""
+    return obj in _namespaces
+
+
+def _name(mod: ModuleType) -> str:
+    # the alias proxy would resolve its target for mod.__name__
+    return cast(str, _module_dict(mod)["__name__"])
+
+
+def _live_namespaces() -> list[ModuleType]:
+    with _lock:
+        found = list(_namespaces)
+    return sorted(found, key=_name)
+
+
+def _live_aliases() -> list[ModuleType]:
+    with _alias_module._aliases_lock:
+        found = list(_aliases)
+    return sorted(found, key=_name)
+
+
+def namespaces() -> list[ModuleType]:
+    """return the live apipkg namespaces (both backends), sorted by name"""
+    return _live_namespaces()
+
+
+def namespace_status() -> list[NamespaceStatus]:
+    """report how many exports of each live namespace and alias are resolved"""
+    status = []
+    for mod in _live_namespaces():
+        exportmap = _module_dict(mod)["__map__"]
+        pending = len([name for name in exportmap if name != "__onfirstaccess__"])
+        total = _namespaces.get(mod, pending)
+        status.append(
+            NamespaceStatus(mod.__name__, "namespace", pending, max(total - pending, 0))
+        )
+    for alias in _live_aliases():
+        resolved = _alias_resolved(alias)
+        status.append(
+            NamespaceStatus(_name(alias), "alias", int(not resolved), int(resolved))
+        )
+    return status
+
+
+def _iter_exports(mod: ModuleType) -> Iterator[tuple[str, str, str | None]]:
+    """yield ``(dotted name, modpath, attrname)`` for the pending exports of
+    mod and its nested namespaces and for their module aliases (with attrname
+    None), without resolving any of them"""
+    _expand_deferred(mod)
+    ns = _module_dict(mod)
+    for name, (modpath, attrname) in list(ns["__map__"].items()):
+        if name == "__onfirstaccess__":
+            continue
+        if not attrname:
+            deferred, target = _deferred_target(modpath)
+            if deferred and target is not None:
+                yield f"{mod.__name__}.{name}", target, None
+                continue
+        yield f"{mod.__name__}.{name}", modpath, attrname
+    children = set()
+    for name in ns["__all__"]:
+        child = ns.get(name)
+        if isinstance(child, ModuleType) and _is_namespace(child):
+            children.add(name)
+            yield from _iter_exports(child)
+    # aliases with dotted export names are only reachable through sys.modules,
+    # so find them by name, those below nested namespaces were handled above
+    prefix = mod.__name__ + "."
+    for alias in _live_aliases():
+        name = _name(alias)
+        if (
+            name.startswith(prefix)
+            and name[len(prefix) :].split(".")[0] not in children
+        ):
+            yield name, _alias_spec(alias)[0], None
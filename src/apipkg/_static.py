@@ -0,0 +1,278 @@
+"""check the exports of an apipkg package without importing their modules.
+
+the implementation modules are located with the import system's finders
+and parsed, an export is valid if its module binds the name at module level,
+directly, through ``from x import y`` (followed to x) or through a star
+import (restricted by the ``__all__`` of the imported module). modules
+without python source, e.g. extension modules, are imported instead.
+attributes that cannot be known without running code, like the members of
+instances or names provided by a module ``__getattr__``, are reported as
+unverified rather than broken.
+"""
+from __future__ import annotations
+
+import ast
+import sys
+from importlib.machinery import ModuleSpec
+from importlib.machinery import PathFinder
+from importlib.util import find_spec
+from importlib.util import spec_from_file_location
+from typing import NamedTuple
+from typing import Tuple
+
+from ._importing import importobj
+
+# (status, error) as in _check.ExportCheck
+_Result = Tuple[str, "str | None"]
+_OK: _Result = ("ok", None)
+
+
+class _Binding(NamedTuple):
+    # "value", "class", "module" (import x) or "from" (from x import y)
+    kind: str
+    # the imported module for "module" and "from"
+    modpath: str | None = None
+    # the imported name for "from", the body names for "class"
+    names: tuple[str, ...] = ()
+
+
+class _ModuleInfo(NamedTuple):
+    names: dict[str, _Binding]
+    # modules star imported, in order
+    stars: list[str]
+    # the literal __all__, None if absent or not a literal
+    all: list[str] | None
+    # defines a module level __getattr__
+    dynamic: bool
+    is_package: bool
+
+
+def _find_spec(modpath: str) -> ModuleSpec | None:
+    """locate modpath without importing (and running) parent packages"""
+    mod = sys.modules.get(modpath)
+    if mod is not None:
+        spec = getattr(mod, "__spec__", None)
+        if spec is None and getattr(mod, "__file__", None):
+            # e.g. a package initpkg turned into a namespace without a spec
+            spec = spec_from_file_location(
+                modpath,
+                mod.__file__,
+                submodule_search_locations=getattr(mod, "__path__", None),
+            )
+        return spec
+    parent, _, _ = modpath.rpartition(".")
+    if not parent or parent in sys.modules:
+        try:
+            return find_spec(modpath)
+        except (ImportError, ValueError):
+            return None
+    parent_spec = _find_spec(parent)
+    if parent_spec is None or parent_spec.submodule_search_locations is None:
+        return None
+    return PathFinder.find_spec(modpath, parent_spec.submodule_search_locations)
+
+
+def _absolute(modpath: str, is_package: bool, node: ast.ImportFrom) -> str:
+    if not node.level:
+        return node.module or ""
+    base = modpath if is_package else modpath.rpartition(".")[0]
+    for _ in range(node.level - 1):
+        base = base.rpartition(".")[0]
+    return f"{base}.{node.module}" if node.module else base
+
+
+def _literal_names(node: ast.expr) -> list[str] | None:
+    try:
+        value = ast.literal_eval(node)
+    except ValueError:
+        return None
+    if isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value):
+        return list(value)
+    return None
+
+
+def _target_names(target: ast.expr) -> list[str]:
+    if isinstance(target, ast.Name):
+        return [target.id]
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return [name for elt in target.elts for name in _target_names(elt)]
+    if isinstance(target, ast.Starred):
+        return _target_names(target.value)
+    return []
+
+
+def _assigned(node: ast.Assign | ast.AnnAssign | ast.AugAssign) -> list[str]:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    return [name for target in targets for name in _target_names(target)]
+
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _parse(modpath: str, source: str, is_package: bool) -> _ModuleInfo:
+    info = _ModuleInfo({}, [], None, False, is_package)
+    names = info.names
+
+    def visit(body: list[ast.stmt]) -> None:
+        nonlocal info
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                names[node.name] = _Binding("value")
+                if node.name == "__getattr__":
+                    info = info._replace(dynamic=True)
+            elif isinstance(node, ast.ClassDef):
+                members: list[str] = []
+                for stmt in node.body:
+                    if isinstance(stmt, (ast.Assign, ast.AnnAssign)):
+                        members += _assigned(stmt)
+                    elif isinstance(stmt, _SCOPES):
+                        members.append(stmt.name)
+                names[node.name] = _Binding("class", names=tuple(members))
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        names[alias.asname] = _Binding("module", alias.name)
+                    else:
+                        top = alias.name.partition(".")[0]
+                        names[top] = _Binding("module", top)
+            elif isinstance(node, ast.ImportFrom):
+                source = _absolute(modpath, is_package, node)
+                for alias in node.names:
+                    if alias.name == "*":
+                        info.stars.append(source)
+                    else:
+                        names[alias.asname or alias.name] = _Binding(
+                            "from", source, (alias.name,)
+                        )
+            elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                for name in _assigned(node):
+                    names[name] = _Binding("value")
+                    if name == "__all__" and isinstance(node, ast.Assign):
+                        info = info._replace(all=_literal_names(node.value))
+                    elif name == "__all__" and isinstance(node, ast.AugAssign):
+                        extra = _literal_names(node.value)
+                        if info.all is not None and extra is not None:
+                            info = info._replace(all=info.all + extra)
+                        else:
+                            info = info._replace(all=None)
+            elif isinstance(node, (ast.For, ast.AsyncFor)):
+                for name in _target_names(node.target):
+                    names[name] = _Binding("value")
+            elif isinstance(node, (ast.With, ast.AsyncWith)):
+                for item in node.items:
+                    if item.optional_vars is not None:
+                        for name in _target_names(item.optional_vars):
+                            names[name] = _Binding("value")
+            if isinstance(node, _SCOPES):
+                continue
+            # names bound conditionally count as bound (if/try/while/...)
+            for field in ("body", "orelse", "finalbody"):
+                visit(getattr(node, field, []))
+            for handler in getattr(node, "handlers", []):
+                visit(handler.body)
+
+    visit(ast.parse(source).body)
+    return info
+
+
+class _StaticResolver:
+    def __init__(self) -> None:
+        # modpath -> parsed module, None if not found, "import" without source
+        self.modules: dict[str, _ModuleInfo | str | None] = {}
+
+    def module(self, modpath: str) -> _ModuleInfo | str | None:
+        if modpath not in self.modules:
+            self.modules[modpath] = self._load(modpath)
+        return self.modules[modpath]
+
+    def _load(self, modpath: str) -> _ModuleInfo | str | None:
+        spec = _find_spec(modpath)
+        if spec is None:
+            return None
+        is_package = spec.submodule_search_locations is not None
+        if spec.loader is None:
+            # a namespace package, only its submodules are attributes
+            return _ModuleInfo({}, [], None, False, is_package)
+        get_source = getattr(spec.loader, "get_source", None)
+        try:
+            source = get_source(modpath) if get_source is not None else None
+        except ImportError:
+            source = None
+        if source is None:
+            return "import"
+        try:
+            return _parse(modpath, source, is_package)
+        except SyntaxError:
+            return "import"
+
+    def resolve(self, modpath: str, attrname: str | None) -> _Result:
+        info = self.module(modpath)
+        if info is None:
+            return "import-error", f"ModuleNotFoundError: no module named {modpath!r}"
+        if not attrname:
+            return _OK
+        return self.lookup(modpath, attrname.split("."), set())
+
+    def lookup(self, modpath: str, parts: list[str], seen: set[str]) -> _Result:
+        info = self.module(modpath)
+        if info is None:
+            return "import-error", f"ModuleNotFoundError: no module named {modpath!r}"
+        if isinstance(info, str):
+            return _imported(modpath, parts)
+        key = f"{modpath}:{'.'.join(parts)}"
+        if key in seen:
+            return "unverified", f"circular re-export of {key}"
+        seen.add(key)
+        name, rest = parts[0], parts[1:]
+        binding = info.names.get(name)
+        if binding is not None:
+            return self.follow(binding, rest, seen)
+        for star in info.stars:
+            starred = self.module(star)
+            exported = (
+                starred.all
+                if isinstance(starred, _ModuleInfo) and starred.all is not None
+                else None
+            )
+            if exported is not None and name not in exported:
+                continue
+            result = self.lookup(star, parts, seen)
+            if result[0] != "broken-spec":
+                return result
+        if info.is_package and self.module(f"{modpath}.{name}") is not None:
+            return "unverified", f"{modpath}.{name} is a submodule not imported there"
+        if info.dynamic:
+            return "unverified", f"{modpath} has a module __getattr__"
+        return "broken-spec", f"AttributeError: {modpath!r} does not define {name!r}"
+
+    def follow(self, binding: _Binding, rest: list[str], seen: set[str]) -> _Result:
+        if binding.kind == "module":
+            assert binding.modpath is not None
+            return self.lookup(binding.modpath, rest, seen) if rest else _OK
+        if binding.kind == "from":
+            assert binding.modpath is not None
+            source, name = binding.modpath, binding.names[0]
+            info = self.module(source)
+            if isinstance(info, _ModuleInfo) and name not in info.names:
+                # from package import submodule
+                submodule = f"{source}.{name}"
+                if self.module(submodule) is not None:
+                    return self.lookup(submodule, rest, seen) if rest else _OK
+            return self.lookup(source, [name, *rest], seen)
+        if not rest:
+            return _OK
+        if binding.kind == "class" and len(rest) == 1 and rest[0] in binding.names:
+            return _OK
+        # attributes of instances and inherited members need the code to run
+        return "unverified", f"attribute {'.'.join(rest)!r} of a runtime value"
+
+
+def _imported(modpath: str, parts: list[str]) -> _Result:
+    """check an export of a module without python source by importing it"""
+    try:
+        importobj(modpath, ".".join(parts))
+    except AttributeError as e:
+        return "broken-spec", f"{type(e).__name__}: {e}"
+    except Exception as e:
+        return "import-error", f"{type(e).__name__}: {e}"
+    return _OK
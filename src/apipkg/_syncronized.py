@@ -1,18 +1,370 @@
 from __future__ import annotations
 
+import contextlib
 import functools
+import os
+import sys
 import threading
+import time
+from typing import Hashable
+from typing import Iterator
+from typing import NamedTuple
 
+from . import _alias_module
+from . import _finder
+from . import _manifest
+from . import _metadata
+from . import _registry
+from . import _timing
+from ._importing import _import_lock_owners
 
-def _synchronized(wrapped_function):
-    """Decorator to synchronise __getattr__ calls."""
+LOCKING_STRATEGIES = ("per-export", "global", "none")
+TIMEOUT_ACTIONS = ("raise", "log")
+
+_strategy = "global"
+_timeout: float | None = None
+_timeout_action = "raise"
+# how often a waiting thread checks whether the owner of the cell it waits
+# for started to wait for a module lock held by the waiting thread
+_DEADLOCK_CHECK_INTERVAL = 0.05
+
+# guards the bookkeeping of all once-cells below, it is never held while
+# user code (imports, __onfirstaccess__ hooks) runs
+_mutex = threading.Lock()
+_cells: dict[Hashable, _OnceCell] = {}
+# thread ident -> cell that thread is currently waiting for
+_blocking_on: dict[int, _OnceCell] = {}
+
+
+class LockStats(NamedTuple):
+    """once-cell acquisitions and how often and long they had to wait"""
+
+    acquisitions: int
+    waits: int
+    wait_time: float
+    max_wait: float
+    timeouts: int
+
+
+class _Counters:
+    # updated under _mutex, which _acquire holds anyway
+    __slots__ = ("acquisitions", "waits", "wait_time", "max_wait", "timeouts")
+
+    def __init__(self) -> None:
+        self.acquisitions = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def stats(self) -> LockStats:
+        return LockStats(
+            self.acquisitions,
+            self.waits,
+            self.wait_time,
+            self.max_wait,
+            self.timeouts,
+        )
+
+
+# namespace -> counters of the names resolved in it
+_counters: dict[str, _Counters] = {}
+
+
+def _namespace_counters(export: tuple[str, str] | None) -> _Counters:
+    namespace = export[0] if export else ""
+    counters = _counters.get(namespace)
+    if counters is None:
+        counters = _counters[namespace] = _Counters()
+    return counters
+
+
+class _OnceCell:
+    """reentrant lock guarding the resolution of a single lazy name.
+
+    cells only exist while someone is resolving their name, once a name is
+    resolved it lives in the module namespace and lookups never get here.
+    """
+
+    __slots__ = ("key", "owner", "count", "waiters", "released")
+
+    def __init__(self, key: Hashable) -> None:
+        self.key = key
+        self.owner: int | None = None
+        self.count = 0
+        self.waiters = 0
+        self.released = threading.Condition(_mutex)
+
+
+def _would_deadlock(cell: _OnceCell, me: int) -> bool:
+    # follow the owners and what they wait for, cells as well as module
+    # locks of the import system, like importlib's _ModuleLock.has_deadlock
+    seen = set()
+    owners = [cell.owner]
+    while owners:
+        owner = owners.pop()
+        if owner is None or owner in seen:
+            continue
+        if owner == me:
+            return True
+        seen.add(owner)
+        blocked = _blocking_on.get(owner)
+        if blocked is not None:
+            owners.append(blocked.owner)
+        owners += _import_lock_owners(owner)
+    return False
+
+
+def _acquire(key: Hashable, export: tuple[str, str] | None = None) -> _OnceCell | None:
+    """acquire the cell for key, returns None when waiting would deadlock.
+
+    export is the name being resolved, for diagnostics when key is shared.
+    """
+    me = threading.get_ident()
+    timeout = _timeout
+    waited = False
+    started = 0.0
+    while True:
+        with _mutex:
+            cell = _cells.get(key)
+            if cell is None:
+                cell = _cells[key] = _OnceCell(key)
+            if cell.owner is not None and cell.owner != me:
+                # two threads resolving names whose imports need each other:
+                # proceed without the cell and accept a concurrent resolution,
+                # which is what the import system does for circular imports
+                if _would_deadlock(cell, me):
+                    return None
+                if not waited:
+                    waited = True
+                    started = time.perf_counter()
+                wait = _DEADLOCK_CHECK_INTERVAL
+                if timeout is not None:
+                    wait = min(wait, started + timeout - time.perf_counter())
+                cell.waiters += 1
+                _blocking_on[me] = cell
+                try:
+                    released = cell.released.wait_for(
+                        lambda: cell.owner is None, max(wait, 0.0)
+                    )
+                finally:
+                    cell.waiters -= 1
+                    del _blocking_on[me]
+                if not released:
+                    if timeout is None or time.perf_counter() - started < timeout:
+                        # the owner may since wait for an import we are running
+                        continue
+                    holder = cell.owner
+                    _namespace_counters(export).timeouts += 1
+            if cell.owner is None or cell.owner == me:
+                cell.owner = me
+                cell.count += 1
+                counters = _namespace_counters(export)
+                counters.acquisitions += 1
+                if waited:
+                    wait = time.perf_counter() - started
+                    counters.waits += 1
+                    counters.wait_time += wait
+                    counters.max_wait = max(counters.max_wait, wait)
+                return cell
+        # reported without holding the mutex, a logging handler may well
+        # access lazy names itself
+        _report_timeout(export, holder, me, time.perf_counter() - started)
+        timeout = None
+
+
+def _report_timeout(
+    export: tuple[str, str] | None, holder: int | None, me: int, waited: float
+) -> None:
+    import traceback
+
+    names = {t.ident: t.name for t in threading.enumerate()}
+    frames = sys._current_frames()
+    what = ".".join(export) if export else "a lazy name"
+    lines = [
+        f"waited {waited:.1f}s to resolve {what}, "
+        f"the lock is held by thread {names.get(holder, holder)!r}"
+    ]
+    for title, ident in [("holding", holder), ("waiting", me)]:
+        frame = frames.get(ident) if ident is not None else None
+        lines.append(f"stack of the {title} thread {names.get(ident, ident)!r}:")
+        if frame is not None:
+            lines.append("".join(traceback.format_stack(frame)).rstrip())
+    message = "\n".join(lines)
+    if _timeout_action == "raise":
+        raise TimeoutError(message)
+    import logging
+
+    logging.getLogger("apipkg").warning(message)
 
-    # Lock shared between all instances of ApiModule to avoid possible deadlocks
-    lock = threading.RLock()
+
+def _reinit_after_fork() -> None:
+    # only the forking thread exists in the child, cells owned or waited for
+    # by other threads would never be released. the mutex, and the locks of
+    # the other modules, may have been held by one of them at fork time, so
+    # they are all replaced as well
+    global _mutex
+    _mutex = threading.Lock()
+    me = threading.get_ident()
+    for key, cell in list(_cells.items()):
+        if cell.owner == me:
+            cell.waiters = 0
+            cell.released = threading.Condition(_mutex)
+        else:
+            del _cells[key]
+    _blocking_on.clear()
+    _alias_module._aliases_lock = threading.Lock()
+    _finder._lock = threading.RLock()
+    _metadata._lock = threading.Lock()
+    _registry._lock = threading.Lock()
+    for recorder in (_manifest._recorder, _timing._recorder):
+        if recorder is not None:
+            recorder.lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+def _release(cell: _OnceCell) -> None:
+    with _mutex:
+        cell.count -= 1
+        if cell.count:
+            return
+        cell.owner = None
+        if cell.waiters:
+            cell.released.notify_all()
+        elif _cells.get(cell.key) is cell:
+            del _cells[cell.key]
+
+
+@contextlib.contextmanager
+def _resolving(namespace: str, name: str) -> Iterator[None]:
+    """hold the once-cell for resolving name in namespace"""
+    if _strategy == "none":
+        yield
+        return
+    export = (namespace, name)
+    cell = _acquire(export if _strategy == "per-export" else None, export)
+    try:
+        yield
+    finally:
+        if cell is not None:
+            _release(cell)
+
+
+def _synchronized(wrapped_function):
+    """Decorator to synchronise the lazy resolution of name on a namespace."""
 
     @functools.wraps(wrapped_function)
-    def synchronized_wrapper_function(*args, **kwargs):
-        with lock:
-            return wrapped_function(*args, **kwargs)
+    def synchronized_wrapper_function(self, name, *args, **kwargs):
+        accesses = _manifest._recorder
+        if accesses is not None and name != "__onfirstaccess__":
+            if name in self.__map__:
+                accesses.record(self.__name__, name)
+        recorder = _timing._recorder
+        if recorder is None:
+            with _resolving(self.__name__, name):
+                return wrapped_function(self, name, *args, **kwargs)
+        started = time.perf_counter()
+        with _resolving(self.__name__, name):
+            pending = name in self.__map__
+            with recorder.resolution(self.__name__, name, started, pending):
+                return wrapped_function(self, name, *args, **kwargs)
 
     return synchronized_wrapper_function
+
+
+def set_locking(strategy: str) -> str:
+    """select how concurrent resolution of lazy names is synchronized.
+
+    * ``"global"`` (the default) - one lock shared by all namespaces
+    * ``"per-export"`` - threads only wait for each other when they resolve
+      the same name of the same namespace. two threads whose imports need
+      each other then import concurrently, so one of them may see a
+      partially initialized module, as with circular imports
+    * ``"none"`` - no locking at all, for single-threaded programs
+
+    returns the previously active strategy.
+    """
+    global _strategy
+    if strategy not in LOCKING_STRATEGIES:
+        raise ValueError(
+            f"unknown locking strategy {strategy!r}, "
+            f"expected one of {', '.join(LOCKING_STRATEGIES)}"
+        )
+    previous, _strategy = _strategy, strategy
+    return previous
+
+
+def set_lock_timeout(timeout: float | None, action: str = "raise") -> float | None:
+    """limit how long resolving a name waits for another thread resolving it.
+
+    once timeout seconds have passed either a ``TimeoutError`` is raised
+    (``action="raise"``) or a warning is logged to the ``apipkg`` logger and
+    the wait continues (``action="log"``). both name the export, the thread
+    holding it and the stacks of the two threads. ``None`` waits forever.
+
+    returns the previous timeout.
+    """
+    global _timeout, _timeout_action
+    if action not in TIMEOUT_ACTIONS:
+        raise ValueError(
+            f"unknown timeout action {action!r}, "
+            f"expected one of {', '.join(TIMEOUT_ACTIONS)}"
+        )
+    previous, _timeout, _timeout_action = _timeout, timeout, action
+    return previous
+
+
+def namespace_lock_stats(reset: bool = False) -> dict[str, LockStats]:
+    """lock_stats per namespace, sorted by namespace name"""
+    global _counters
+    with _mutex:
+        stats = {name: counters.stats() for name, counters in _counters.items()}
+        if reset:
+            _counters = {}
+    return dict(sorted(stats.items()))
+
+
+def lock_stats(reset: bool = False) -> LockStats:
+    """how often resolving names took a once-cell, and waited for it"""
+    stats = namespace_lock_stats(reset).values()
+    return LockStats(
+        sum(s.acquisitions for s in stats),
+        sum(s.waits for s in stats),
+        sum(s.wait_time for s in stats),
+        max((s.max_wait for s in stats), default=0.0),
+        sum(s.timeouts for s in stats),
+    )
+
+
+_OPENMETRICS = [
+    ("acquisitions", "counter", "", "once-cell acquisitions"),
+    ("waits", "counter", "", "acquisitions that waited for another thread"),
+    ("wait_time", "counter", "seconds", "time spent waiting for once-cells"),
+    ("max_wait", "gauge", "seconds", "longest single wait for a once-cell"),
+    ("timeouts", "counter", "", "waits that exceeded the lock timeout"),
+]
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def lock_stats_openmetrics() -> str:
+    """namespace_lock_stats in the OpenMetrics (Prometheus) text format"""
+    stats = namespace_lock_stats()
+    lines = []
+    for field, kind, unit, help in _OPENMETRICS:
+        family = f"apipkg_lock_{field}" + (f"_{unit}" if unit else "")
+        lines.append(f"# TYPE {family} {kind}")
+        if unit:
+            lines.append(f"# UNIT {family} {unit}")
+        lines.append(f"# HELP {family} {help}")
+        sample = f"{family}_total" if kind == "counter" else family
+        for namespace, namespace_stats in stats.items():
+            value = getattr(namespace_stats, field)
+            lines.append(f'{sample}{{namespace="{_label(namespace)}"}} {value}')
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
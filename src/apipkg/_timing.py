@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Iterator
+from typing import NamedTuple
+
+TIMING_ENV = "APIPKG_TIMING"
+
+
+class ResolutionRecord(NamedTuple):
+    """timing of one lazy export resolution, all times in seconds"""
+
+    export: str
+    thread: str
+    wait: float
+    import_: float
+    modules: tuple[str, ...]
+    error: str | None
+
+    @property
+    def total(self) -> float:
+        return self.wait + self.import_
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.records: list[ResolutionRecord] = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def resolution(
+        self, namespace: str, name: str, started: float, pending: bool
+    ) -> Iterator[None]:
+        acquired = time.perf_counter()
+        before = set(sys.modules)
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            # only names that were still unresolved once the cell was held
+            # are recorded, waiting for a concurrent resolution is not one
+            if pending:
+                done = time.perf_counter()
+                record = ResolutionRecord(
+                    export=f"{namespace}.{name}",
+                    thread=threading.current_thread().name,
+                    wait=acquired - started,
+                    import_=done - acquired,
+                    # under concurrency imports done by other threads
+                    # in the meantime are attributed here as well
+                    modules=tuple(sorted(set(sys.modules) - before)),
+                    error=error,
+                )
+                with self.lock:
+                    self.records.append(record)
+
+
+_recorder: _Recorder | None = None
+
+
+def record_timings(enabled: bool = True) -> None:
+    """start (or stop) recording how long resolving each lazy export takes.
+
+    starting a recording discards the records of a previous one, the
+    ``APIPKG_TIMING`` environment variable starts it at import time.
+    """
+    global _recorder
+    _recorder = _Recorder() if enabled else None
+
+
+def timing_records() -> list[ResolutionRecord]:
+    """return the recorded resolutions, slowest first"""
+    if _recorder is None:
+        return []
+    with _recorder.lock:
+        records = list(_recorder.records)
+    return sorted(records, key=lambda r: r.total, reverse=True)
+
+
+def timing_report(format: str = "text") -> str:
+    """render the recorded resolutions as ``"text"`` or ``"json"``"""
+    records = timing_records()
+    if format == "json":
+        return json.dumps([dict(r._asdict(), total=r.total) for r in records], indent=2)
+    elif format != "text":
+        raise ValueError(f"unknown report format {format!r}")
+    total = sum(r.total for r in records)
+    lines = [
+        f"apipkg resolution timings ({len(records)} exports, {total:.4f}s total)",
+        f"{'total':>9} {'wait':>9} {'import':>9} {'modules':>8}  "
+        f"{'thread':<16} export",
+    ]
+    for r in records:
+        line = (
+            f"{r.total:9.4f} {r.wait:9.4f} {r.import_:9.4f} {len(r.modules):8d}  "
+            f"{r.thread:<16} {r.export}"
+        )
+        if r.error is not None:
+            line += f" ({r.error})"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def _report_at_exit(target: str) -> None:
+    if target.endswith(".json"):
+        with open(target, "w") as fp:
+            fp.write(timing_report("json"))
+    elif target.endswith(".txt"):
+        with open(target, "w") as fp:
+            fp.write(timing_report())
+    else:
+        sys.stderr.write(timing_report())
+
+
+def _configure_from_env() -> None:
+    """``APIPKG_TIMING=1`` reports to stderr at exit, a path ending
+    in ``.json`` or ``.txt`` writes the report to that file instead"""
+    target = os.environ.get(TIMING_ENV)
+    if target:
+        record_timings()
+        atexit.register(_report_at_exit, target)
+
+
+_configure_from_env()
@@ -1,8 +1,13 @@
+import gc
+import importlib
+import json
 import os.path
+import signal
 import subprocess
 import sys
 import textwrap
 import threading
+import time
 import types
 
 import pytest
@@ -617,6 +622,505 @@ def test_import_race(tmpdir, monkeypatch):
         assert thread.importrace is importrace
 
 
+@pytest.fixture
+def locking():
+    previous = apipkg.set_locking("per-export")
+    yield apipkg.set_locking
+    apipkg.set_locking(previous)
+
+
+@pytest.mark.skipif("threading" not in sys.modules, reason="requires thread support")
+def test_slow_export_does_not_block_others(tmpdir, monkeypatch, locking):
+    pkgdir = tmpdir.mkdir("slowexport")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, exportdefs={
+            'slow': '.slowmod:slow',
+            'fast': '.fastmod:fast',
+            },
+        )
+    """
+        )
+    )
+    pkgdir.join("slowmod.py").write(
+        textwrap.dedent(
+            """
+        import slowexport_gate
+        assert slowexport_gate.fast_done.wait(5)
+        slow = 1
+    """
+        )
+    )
+    pkgdir.join("fastmod.py").write("fast = 2")
+    gate = ModuleType("slowexport_gate")
+    gate.fast_done = threading.Event()  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "slowexport_gate", gate)
+    monkeypatch.syspath_prepend(tmpdir)
+    import slowexport  # type: ignore
+
+    results = []
+    slow = threading.Thread(target=lambda: results.append(slowexport.slow))
+    slow.start()
+    # the slow import is running, resolving an unrelated name must not wait for it
+    assert slowexport.fast == 2
+    gate.fast_done.set()  # type: ignore[attr-defined]
+    slow.join()
+    assert results == [1]
+
+
+def test_once_cell_deadlock_detection():
+    from apipkg import _syncronized
+
+    first, second = ("ns", "first"), ("ns", "second")
+    holding = threading.Barrier(2)
+    outcome = {}
+
+    def run(mine, other):
+        cell = _syncronized._acquire(mine)
+        holding.wait()
+        if mine == second:
+            # wait until the first thread blocks on our cell
+            while not _syncronized._blocking_on:
+                time.sleep(0.001)
+        outcome[mine] = _syncronized._acquire(other)
+        for acquired in (outcome[mine], cell):
+            if acquired is not None:
+                _syncronized._release(acquired)
+
+    threads = [
+        threading.Thread(target=run, args=(first, second)),
+        threading.Thread(target=run, args=(second, first)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    # the thread closing the cycle proceeds without the cell
+    assert outcome[second] is None
+    assert outcome[first] is not None
+    assert not _syncronized._cells
+
+
+@pytest.mark.parametrize("strategy", ["global", "per-export"])
+def test_cross_thread_import_cycle(tmpdir, monkeypatch, locking, strategy):
+    pkgname = "importcycle_" + strategy.replace("-", "_")
+    pkgdir = tmpdir.mkdir(pkgname)
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, {"X": "._a:X", "Y": "._b:Y"})
+    """
+        )
+    )
+    # _a needs Y while _b, resolved on another thread, imports _a
+    pkgdir.join("_a.py").write(
+        textwrap.dedent(
+            f"""
+        import time
+        import importcycle_gate
+        # with the global lock _b only starts once this import is done
+        importcycle_gate.b_started.wait(0.5)
+        time.sleep(0.1)
+        import {pkgname}
+        X = {pkgname}.Y - 1
+    """
+        )
+    )
+    pkgdir.join("_b.py").write(
+        textwrap.dedent(
+            f"""
+        import importcycle_gate
+        importcycle_gate.b_started.set()
+        import {pkgname}._a
+        Y = 2
+    """
+        )
+    )
+    gate = ModuleType("importcycle_gate")
+    gate.b_started = threading.Event()  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "importcycle_gate", gate)
+    monkeypatch.syspath_prepend(tmpdir)
+    locking(strategy)
+    mod = importlib.import_module(pkgname)
+    results = {}
+
+    def resolve(name):
+        try:
+            results[name] = getattr(mod, name)
+        except Exception as e:
+            results[name] = e
+
+    first = threading.Thread(target=resolve, args=("X",), daemon=True)
+    first.start()
+    time.sleep(0.05)
+    second = threading.Thread(target=resolve, args=("Y",), daemon=True)
+    second.start()
+    first.join(5)
+    second.join(5)
+    assert not first.is_alive() and not second.is_alive()
+    assert results["Y"] == 2
+    if strategy == "global":
+        assert results["X"] == 1
+    else:
+        # as with a circular import, one of the threads sees a partial module
+        assert isinstance(results["X"], AttributeError)
+
+
+@pytest.mark.parametrize("strategy", ["global", "none"])
+def test_locking_strategies(locking, strategy):
+    locking(strategy)
+    api = apipkg.ApiModule("locking_" + strategy, {"abspath": "os.path:abspath"})
+    assert api.abspath is os.path.abspath
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_miss_takes_no_lock(monkeypatch, locking, backend):
+    locking("per-export")
+    mod = apipkg.initpkg(
+        f"fast_miss_{backend}",
+        {"__onfirstaccess__": "gc:collect", "dedent": "textwrap:dedent"},
+        backend=backend,
+    )
+    assert not hasattr(mod, "absent")
+
+    def fail(key, export):
+        raise AssertionError(f"acquired {export}")
+
+    monkeypatch.setattr(apipkg._syncronized, "_acquire", fail)
+    assert not hasattr(mod, "absent")
+    assert getattr(mod, "other", 42) == 42
+    with pytest.raises(AssertionError, match="dedent"):
+        mod.dedent
+
+
+@pytest.fixture
+def lock_timeout():
+    apipkg.lock_stats(reset=True)
+    yield apipkg.set_lock_timeout
+    apipkg.set_lock_timeout(None)
+
+
+def hold_export(namespace, name, seconds):
+    """hold the once-cell of an export on a thread named holder"""
+    holding = threading.Event()
+
+    def holder_function():
+        with apipkg._syncronized._resolving(namespace, name):
+            holding.set()
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=holder_function, name="holder")
+    thread.start()
+    holding.wait()
+    return thread
+
+
+def test_lock_timeout_raises(locking, lock_timeout):
+    locking("per-export")
+    mod = apipkg.initpkg("lock_timeout_raise", {"dedent": "textwrap:dedent"})
+    lock_timeout(0.05)
+    thread = hold_export("lock_timeout_raise", "dedent", 0.5)
+    with pytest.raises(TimeoutError) as excinfo:
+        mod.dedent
+    thread.join()
+    message = str(excinfo.value)
+    assert "to resolve lock_timeout_raise.dedent" in message
+    assert "held by thread 'holder'" in message
+    assert "in holder_function" in message and "in test_lock_timeout_raises" in message
+    stats = apipkg.lock_stats()
+    assert stats.timeouts == 1 and stats.waits == 0
+    assert mod.dedent is textwrap.dedent
+
+
+def test_lock_timeout_logs(locking, lock_timeout, caplog):
+    locking("per-export")
+    mod = apipkg.initpkg("lock_timeout_log", {"dedent": "textwrap:dedent"})
+    assert lock_timeout(0.05, action="log") is None
+    thread = hold_export("lock_timeout_log", "dedent", 0.3)
+    assert mod.dedent is textwrap.dedent
+    thread.join()
+    [record] = caplog.records
+    assert record.name == "apipkg" and "held by thread 'holder'" in record.message
+    stats = apipkg.lock_stats(reset=True)
+    assert stats.waits == 1 and stats.timeouts == 1 and stats.wait_time >= 0.2
+    assert apipkg.lock_stats() == (0, 0, 0.0, 0.0, 0)
+    with pytest.raises(ValueError, match="unknown timeout action"):
+        lock_timeout(1, action="ignore")
+
+
+def test_lock_stats_by_namespace(locking, lock_timeout):
+    locking("per-export")
+    mod = apipkg.initpkg(
+        'lock_"stats"', {"dedent": "textwrap:dedent", "join": "os.path:join"}
+    )
+    thread = hold_export('lock_"stats"', "dedent", 0.1)
+    mod.dedent
+    mod.join
+    thread.join()
+    stats = apipkg.namespace_lock_stats()['lock_"stats"']
+    assert stats.acquisitions == 3 and stats.waits == 1
+    assert stats.max_wait == stats.wait_time and stats.wait_time > 0.05
+    assert apipkg.lock_stats() == stats
+    exported = apipkg.lock_stats_openmetrics()
+    assert "# TYPE apipkg_lock_acquisitions counter\n" in exported
+    assert (
+        'apipkg_lock_acquisitions_total{namespace="lock_\\"stats\\""} 3\n' in exported
+    )
+    assert "# UNIT apipkg_lock_max_wait_seconds seconds\n" in exported
+    assert 'apipkg_lock_max_wait_seconds{namespace="lock_\\"stats\\""} 0.' in exported
+    assert exported.endswith("# EOF\n")
+
+
+def test_locking_unknown_strategy(locking):
+    with pytest.raises(ValueError, match="unknown locking strategy"):
+        locking("sometimes")
+
+
+def test_import_lock_helpers_without_importlib_internals(monkeypatch):
+    monkeypatch.setattr(apipkg._importing, "_bootstrap", ModuleType("changed"))
+    assert apipkg._importing._importing_thread("textwrap") is None
+    assert apipkg._importing._import_lock_owners(threading.get_ident()) == []
+    apipkg._importing._wait_for_module_lock("textwrap")
+    api = apipkg.ApiModule("no_internals", {"dedent": "textwrap:dedent"})
+    assert apipkg.prefetch(api).result(5) == {}
+    assert vars(api)["dedent"] is textwrap.dedent
+
+
+def test_prefetch_order_and_errors(tmpdir, monkeypatch):
+    for name in "abc":
+        tmpdir.join(f"prefetch_impl_{name}.py").write(
+            textwrap.dedent(
+                f"""
+            import threading
+            import prefetch_log
+            prefetch_log.append(({name!r}, threading.current_thread().name))
+            value = {name!r}
+        """
+            )
+        )
+    log = []
+    monkeypatch.setitem(sys.modules, "prefetch_log", log)
+    monkeypatch.syspath_prepend(tmpdir)
+    api = apipkg.ApiModule(
+        "prefetch_order",
+        {
+            "a": "prefetch_impl_a:value",
+            "sub": {"b": "prefetch_impl_b:value"},
+            "c": "prefetch_impl_c:value",
+            "broken": "prefetch_impl_c:missing",
+        },
+    )
+    errors = apipkg.prefetch(api, order=["sub.b", "c"], max_workers=1).result(5)
+    assert list(errors) == ["broken"]
+    assert isinstance(errors["broken"], AttributeError)
+    assert [name for name, _ in log] == ["b", "c", "a"]
+    assert all(thread.startswith("apipkg-prefetch-") for _, thread in log)
+    assert api.a == "a" and api.sub.b == "b" and api.c == "c"
+
+
+def test_prefetch_imports_concurrently(tmpdir, monkeypatch):
+    for name in "abcd":
+        tmpdir.join(f"prefetch_slow_{name}.py").write(
+            f"import time\ntime.sleep(0.3)\nvalue = {name!r}\n"
+        )
+    monkeypatch.syspath_prepend(tmpdir)
+    api = apipkg.ApiModule(
+        "prefetch_concurrent",
+        {
+            **{name: f"prefetch_slow_{name}:value" for name in "abcd"},
+            "dedent": "textwrap:dedent",
+        },
+    )
+    start = time.perf_counter()
+    future = apipkg.prefetch(api, order="abcd", max_workers=4)
+    # the background imports hold no once-cell, even with the global lock
+    assert api.dedent is textwrap.dedent
+    assert time.perf_counter() - start < 0.2
+    assert future.result(5) == {}
+    assert time.perf_counter() - start < 0.9
+    assert [getattr(api, name) for name in "abcd"] == list("abcd")
+
+
+def test_initpkg_prefetch_joins_inflight(tmpdir, monkeypatch):
+    pkgdir = tmpdir.mkdir("prefetchpkg")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, {'slow': '.slowmod:slow'}, prefetch=True)
+    """
+        )
+    )
+    pkgdir.join("slowmod.py").write(
+        textwrap.dedent(
+            """
+        import time
+        import prefetch_gate
+        prefetch_gate.started.set()
+        time.sleep(0.1)
+        prefetch_gate.imports += 1
+        slow = object()
+    """
+        )
+    )
+    gate = ModuleType("prefetch_gate")
+    gate.started = threading.Event()  # type: ignore[attr-defined]
+    gate.imports = 0  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "prefetch_gate", gate)
+    monkeypatch.syspath_prepend(tmpdir)
+    import prefetchpkg  # type: ignore
+
+    assert gate.started.wait(5)  # type: ignore[attr-defined]
+    assert prefetchpkg.slow is prefetchpkg.slowmod.slow
+    assert gate.imports == 1  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_prefetch_waits_for_package_init(tmpdir, monkeypatch, backend):
+    pkgname = f"prefetchinit_{backend}"
+    pkgdir = tmpdir.mkdir(pkgname)
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            f"""
+        import apipkg
+        apipkg.initpkg(
+            __name__, {{'x': '._impl:x'}}, prefetch=True, backend={backend!r}
+        )
+        import time
+        # let the prefetch run while the package is still being imported
+        time.sleep(0.2)
+        def helper():
+            return 42
+    """
+        )
+    )
+    pkgdir.join("_impl.py").write(f"from {pkgname} import helper\nx = helper()\n")
+    monkeypatch.syspath_prepend(tmpdir)
+    mod = importlib.import_module(pkgname)
+    for thread in threading.enumerate():
+        if thread.name.startswith(f"apipkg-prefetch-{pkgname}"):
+            thread.join(5)
+    assert "x" not in mod.__map__
+    assert mod.x == 42
+
+
+@pytest.fixture
+def timings():
+    apipkg.record_timings()
+    yield
+    apipkg.record_timings(False)
+
+
+def test_timing_records(timings):
+    api = apipkg.ApiModule(
+        "timing_records",
+        {"dedent": "textwrap:dedent", "broken": "textwrap:missing", "sub": {}},
+    )
+    assert api.dedent is textwrap.dedent
+    assert api.dedent is textwrap.dedent
+    with pytest.raises(AttributeError):
+        api.broken
+    assert not hasattr(api, "unknown")
+    records = {r.export: r for r in apipkg.timing_records()}
+    assert sorted(records) == ["timing_records.broken", "timing_records.dedent"]
+    dedent = records["timing_records.dedent"]
+    assert dedent.error is None
+    assert dedent.thread == threading.current_thread().name
+    assert dedent.total == dedent.wait + dedent.import_
+    assert "AttributeError" in records["timing_records.broken"].error
+
+    text = apipkg.timing_report()
+    assert text.startswith("apipkg resolution timings (2 exports")
+    assert "timing_records.dedent" in text
+    data = json.loads(apipkg.timing_report("json"))
+    assert {r["export"] for r in data} == set(records)
+    assert all(r["total"] == r["wait"] + r["import_"] for r in data)
+    with pytest.raises(ValueError):
+        apipkg.timing_report("html")
+
+
+def test_timing_env_report(tmpdir):
+    report = tmpdir.join("report.json")
+    subprocess.check_call(
+        [
+            sys.executable,
+            "-c",
+            "import apipkg, os; "
+            "apipkg.initpkg('timing_env', {'path': 'os:path'}).path",
+        ],
+        env=dict(os.environ, APIPKG_TIMING=str(report)),
+    )
+    (record,) = json.loads(report.read())
+    assert record["export"] == "timing_env.path"
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_record_and_replay(tmpdir, monkeypatch, background):
+    manifest = tmpdir.join("manifest.json")
+    pkgdir = tmpdir.mkdir("replaypkg")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            f"""
+        import apipkg
+        apipkg.initpkg(__name__, {{
+            'a': '.impl_a:a',
+            'b': '.impl_b:b',
+            'sub': {{'c': '.impl_c:c'}},
+            'unused': '.impl_unused:unused',
+        }}, replay={str(manifest)!r}, replay_background={background})
+    """
+        )
+    )
+    for name in ["a", "b", "c", "unused"]:
+        pkgdir.join(f"impl_{name}.py").write(f"{name} = {name!r}\n")
+    monkeypatch.syspath_prepend(tmpdir)
+
+    def forget():
+        for name in list(sys.modules):
+            if name.startswith("replaypkg"):
+                del sys.modules[name]
+
+    monkeypatch.setattr(apipkg._manifest, "_recorder", None)
+    apipkg.record_accesses()
+    import replaypkg  # type: ignore
+
+    assert replaypkg.sub.c == "c" and replaypkg.a == "a"
+    assert not hasattr(replaypkg, "absent")
+    assert replaypkg.a == "a"
+    records = apipkg.access_records()
+    assert records == [("replaypkg.sub.c", 1), ("replaypkg.a", 1)]
+    assert records[1].first_lookups == 1
+    apipkg.write_manifest(manifest)
+    apipkg.record_accesses(False)
+    assert apipkg.read_manifest(manifest) == ["replaypkg.sub.c", "replaypkg.a"]
+    forget()
+
+    manifest.write(
+        json.dumps(
+            {
+                "exports": [
+                    {"export": "replaypkg.sub.c", "first_lookups": 1},
+                    {"export": "replaypkg.gone", "first_lookups": 1},
+                    {"export": "other.x", "first_lookups": 1},
+                    {"export": "replaypkg.a", "first_lookups": 2},
+                ]
+            }
+        )
+    )
+    import replaypkg  # type: ignore
+
+    if background:
+        [thread] = [t for t in threading.enumerate() if t.name.startswith("apipkg-r")]
+        thread.join()
+    assert sorted(replaypkg.__map__) == ["b", "unused"]
+    assert replaypkg.sub.__map__ == {}
+    forget()
+
+
 def test_bpython_getattr_override(tmpdir, monkeypatch):
     def patchgetattr(self, name):
         raise AttributeError(name)
@@ -746,6 +1250,39 @@ def test_aliasmodule_repr():
     assert repr(am) == r
 
 
+def test_aliasmodule_shares_one_class():
+    first = apipkg.AliasModule("alias_class_first", "os.path")
+    second = apipkg.AliasModule("alias_class_second", "textwrap", "dedent")
+    assert type(first) is type(second)
+    assert first.join is os.path.join
+    assert second.__name__ == "dedent"
+
+
+@pytest.mark.parametrize(
+    "kind, limit",
+    [("exports", 120), ("aliases", 1000)],
+)
+def test_compact_storage_memory(kind, limit):
+    import tracemalloc
+
+    size = 5000 if kind == "exports" else 200
+    if kind == "exports":
+        defs = {f"name{i}": f"_impl.generated.core:name{i}" for i in range(size)}
+    else:
+        defs = {f"alias{i}": f"_impl.generated.mod{i}" for i in range(size)}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        api = apipkg.ApiModule(f"compact_{kind}", defs)
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    for name in list(sys.modules):
+        if name.startswith(api.__name__ + "."):
+            del sys.modules[name]
+    assert used / size < limit
+
+
 def test_aliasmodule_proxy_methods(tmpdir, monkeypatch):
     pkgdir = tmpdir
     pkgdir.join("aliasmodule_proxy.py").write(
@@ -822,6 +1359,247 @@ def test_aliasmodule_nested_import_with_from(tmpdir, monkeypatch):
     assert "os2.path" not in api1.__dict__
 
 
+def test_aliasmodule_replace_aliases(monkeypatch):
+    monkeypatch.delitem(sys.modules, "replace_aliases", raising=False)
+    monkeypatch.delitem(sys.modules, "replace_aliases.path", raising=False)
+    monkeypatch.delitem(sys.modules, "replace_aliases.sub.tw", raising=False)
+    mod = apipkg.initpkg(
+        "replace_aliases",
+        {"path": "os.path", "sub": {"tw": "textwrap"}},
+        replace_aliases=True,
+    )
+    proxy = mod.path
+    assert isinstance(proxy, ModuleType) and proxy is not os.path
+    assert proxy.join is os.path.join
+    assert mod.path is os.path
+    assert sys.modules["replace_aliases.path"] is os.path
+    # references taken before the swap keep working through the proxy
+    assert proxy.join is os.path.join
+
+    from replace_aliases.sub.tw import dedent  # type: ignore
+
+    assert dedent is textwrap.dedent
+    assert mod.sub.tw is textwrap
+    assert sys.modules["replace_aliases.sub.tw"] is textwrap
+
+
+def test_lazy_dict(tmpdir, monkeypatch):
+    pkgdir = tmpdir.mkdir("lazydictpkg")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, exportdefs={
+            'x': '.submod:x',
+            'y': '.other:y',
+            'sub': {'z': '.other:y'},
+        }, lazy_dict=True)
+    """
+        )
+    )
+    pkgdir.join("submod.py").write("x = 3\n")
+    pkgdir.join("other.py").write("y = 4\n")
+    monkeypatch.syspath_prepend(tmpdir)
+    import lazydictpkg  # type: ignore
+
+    view = vars(lazydictpkg)
+    assert isinstance(view, apipkg.LazyNamespaceDict)
+    assert {"x", "y", "sub", "__name__"} <= set(view)
+    assert {"x", "y", "sub"} <= set(dir(lazydictpkg))
+    assert "x" in view and "missing" not in view
+    assert sorted(view.pending()) == ["x", "y"]
+    assert "lazydictpkg.submod" not in sys.modules
+    assert view["x"] == 3
+    assert view.pending() == ["y"]
+    assert "lazydictpkg.other" not in sys.modules
+    with pytest.raises(KeyError):
+        view["missing"]
+    view["extra"] = 1
+    assert lazydictpkg.extra == 1
+    del view["extra"]
+    assert not hasattr(lazydictpkg, "extra")
+    assert "lazydictpkg.other" not in sys.modules
+
+    ns = view.materialize()
+    assert type(ns) is dict and ns["y"] == 4
+    assert view.pending() == []
+    assert isinstance(vars(lazydictpkg.sub), apipkg.LazyNamespaceDict)
+    assert vars(lazydictpkg.sub).materialize()["z"] == 4
+    apipkg.freeze(lazydictpkg)
+    assert type(vars(lazydictpkg)) is dict
+    assert not [name for name in vars(lazydictpkg) if name.startswith("_ApiModule")]
+
+
+def test_lazy_dict_off_keeps_namespace_clean():
+    mod = apipkg.ApiModule("nolazydict", {"x": "textwrap:dedent"})
+    ns = vars(mod)
+    assert type(ns) is dict and ns["x"] is textwrap.dedent
+    assert "_ApiModule__dictview" not in ns
+
+
+def test_lazy_dict_copy_and_doctest(tmpdir, monkeypatch):
+    import doctest
+
+    pkgdir = tmpdir.mkdir("lazydictdoc")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            '''
+        import apipkg
+        apipkg.initpkg(__name__, {'x': '.submod:x'}, lazy_dict=True)
+        def f():
+            """
+            >>> x + 1
+            4
+            """
+    '''
+        )
+    )
+    pkgdir.join("submod.py").write("x = 3\n")
+    monkeypatch.syspath_prepend(tmpdir)
+    import lazydictdoc  # type: ignore
+
+    view = vars(lazydictdoc)
+    merged = view | {"extra": 1}
+    assert type(merged) is dict and merged["x"] == 3 and "extra" not in view
+    assert ({"x": 0} | view)["x"] == 3
+    copied = view.copy()
+    assert type(copied) is dict and copied["x"] == 3
+    copied["x"] = 0
+    assert lazydictdoc.x == 3
+
+    [test] = doctest.DocTestFinder().find(lazydictdoc)
+    assert test.name == "lazydictdoc.f"
+    assert doctest.DocTestRunner().run(test).failed == 0
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_batch_resolves_siblings(monkeypatch, backend):
+    pkgname = f"batch_{backend}"
+    monkeypatch.delitem(sys.modules, pkgname, raising=False)
+    mod = apipkg.initpkg(
+        pkgname,
+        {
+            "dedent": "textwrap:dedent",
+            "indent": "textwrap:indent",
+            "dedent2": "textwrap:dedent",
+            "join": "os.path:join",
+        },
+        batch=True,
+        backend=backend,
+    )
+    assert mod.dedent is textwrap.dedent
+    assert sorted(mod.__map__) == ["join"]
+    assert vars(mod)["indent"] is textwrap.indent
+    assert vars(mod)["dedent2"] is textwrap.dedent
+
+
+def test_batch_off_keeps_namespace_clean():
+    mod = apipkg.ApiModule("nobatch", {"dedent": "textwrap:dedent"})
+    assert "_ApiModule__batch" not in vars(mod)
+    assert mod.dedent is textwrap.dedent
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_resolve_many(monkeypatch, backend):
+    pkgname = f"resolve_many_{backend}"
+    monkeypatch.delitem(sys.modules, pkgname, raising=False)
+    monkeypatch.delitem(sys.modules, f"{pkgname}.sub", raising=False)
+    calls = []
+    real_importobj = apipkg._module.importobj
+
+    def importobj(modpath, attrname):
+        calls.append((modpath, attrname))
+        return real_importobj(modpath, attrname)
+
+    monkeypatch.setattr(apipkg._module, "importobj", importobj)
+    mod = apipkg.initpkg(
+        pkgname,
+        {
+            "dedent": "textwrap:dedent",
+            "dedent2": "textwrap:dedent",
+            "indent": "textwrap:indent",
+            "sub": {"join": "os.path:join", "broken": "textwrap:missing"},
+        },
+        backend=backend,
+    )
+    result = apipkg.resolve_many(mod, ["dedent", "dedent2", "sub.join"])
+    assert result == {
+        "dedent": textwrap.dedent,
+        "dedent2": textwrap.dedent,
+        "sub.join": os.path.join,
+    }
+    assert calls == [("textwrap", "dedent"), ("os.path", "join")]
+    assert sorted(mod.__map__) == ["indent"]
+    with pytest.raises(AttributeError, match="missing"):
+        apipkg.resolve_many(mod)
+    assert mod.indent is textwrap.indent
+
+
+def test_pep562_backend(tmpdir, monkeypatch):
+    pkgdir = tmpdir.mkdir("pep562pkg")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, exportdefs={
+            '__doc__': '.submod:maindoc',
+            '__onfirstaccess__': '.submod:init',
+            'x': '.submod:x',
+            'y': {
+                'z': '.submod:x'
+            },
+            'path': 'os.path',
+        }, attr={'extra': 1}, backend="pep562")
+    """
+        )
+    )
+    pkgdir.join("submod.py").write(
+        textwrap.dedent(
+            """
+        x = 3
+        maindoc = 'hello'
+        calls = []
+        def init():
+            calls.append(1)
+    """
+        )
+    )
+    monkeypatch.syspath_prepend(tmpdir)
+    import pep562pkg  # type: ignore
+
+    assert type(pep562pkg) is ModuleType
+    assert pep562pkg.__name__ == "pep562pkg"
+    assert pep562pkg.__doc__ == "hello"
+    assert pep562pkg.extra == 1
+    # neither dir() nor vars() resolve anything
+    assert {"x", "y", "path"} <= set(dir(pep562pkg))
+    assert "x" not in vars(pep562pkg)
+    assert pep562pkg.x == 3
+    assert "x" in vars(pep562pkg) and "x" not in pep562pkg.__map__
+    assert pep562pkg.submod.calls == [1]
+    assert pep562pkg.y.z == 3
+    assert sys.modules["pep562pkg.y"] is pep562pkg.y
+    from pep562pkg.path import join  # type: ignore
+
+    assert join is os.path.join
+    with pytest.raises(AttributeError, match="has no attribute 'missing'"):
+        pep562pkg.missing
+    assert pep562pkg.submod.calls == [1]
+
+
+def test_pep562_backend_prefetch_and_errors():
+    mod = apipkg.initpkg(
+        "pep562_prefetch",
+        {"dedent": "textwrap:dedent", "sub": {"join": "os.path:join"}},
+        backend="pep562",
+    )
+    assert apipkg.prefetch(mod).result(5) == {}
+    assert vars(mod)["dedent"] is textwrap.dedent
+    assert vars(mod.sub)["join"] is os.path.join
+    with pytest.raises(ValueError, match="unknown backend"):
+        apipkg.initpkg("pep562_unknown", {}, backend="magic")
+
+
 def test_initpkg_without_old_module():
     apipkg.initpkg("initpkg_without_old_module", dict(modules="sys:modules"))
     from initpkg_without_old_module import modules  # type: ignore
@@ -835,6 +1613,47 @@ def test_get_distribution_version():
     assert apipkg.distribution_version("pytest") is not None
 
 
+def test_distribution_version_cached(tmpdir, monkeypatch):
+    import importlib.metadata
+
+    def write_dist(version):
+        info = tmpdir.join(f"Cached_Dist-{version}.dist-info").ensure(dir=True)
+        info.join("METADATA").write(f"Name: cached.dist\nVersion: {version}\n")
+        return info
+
+    old = write_dist("1.0")
+    monkeypatch.syspath_prepend(tmpdir)
+    assert apipkg.distribution_version("cached-dist") == "1.0"
+
+    def scan(name):
+        raise AssertionError(f"scanned sys.path for {name}")
+
+    monkeypatch.setattr(importlib.metadata, "version", scan)
+    assert apipkg.distribution_version("Cached.Dist") == "1.0"
+    assert apipkg.distribution_version("pytest") is not None
+    monkeypatch.undo()
+
+    monkeypatch.syspath_prepend(tmpdir)
+    old.remove()
+    write_dist("2.0")
+    os.utime(str(tmpdir), ns=(0, 1))
+    assert apipkg.distribution_version("cached_dist") == "2.0"
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_lazy_version(monkeypatch, backend):
+    pkgname = f"lazy_version_{backend}"
+    mod = ModuleType(pkgname)
+    mod.__version__ = "eager"
+    monkeypatch.setitem(sys.modules, pkgname, mod)
+    apipkg.initpkg(
+        pkgname, {"__version__": apipkg.lazy_version("PyTest")}, backend=backend
+    )
+    assert "__version__" in mod.__map__
+    assert mod.__version__ == apipkg.distribution_version("pytest")
+    assert "__version__" not in mod.__map__
+
+
 def test_eagerload_on_bython(monkeypatch):
     monkeypatch.delitem(sys.modules, "bpython", raising=False)
     apipkg.initpkg("apipkg.testmodule.example.lazy", {"test": "apipkg.does_not_exist"})
@@ -845,6 +1664,393 @@ def test_eagerload_on_bython(monkeypatch):
         )
 
 
+def test_eagerload_parallel(tmpdir, monkeypatch):
+    for name in "ab":
+        tmpdir.join(f"eager_impl_{name}.py").write(
+            textwrap.dedent(
+                """
+            import threading
+            thread = threading.current_thread().name
+            value = object()
+        """
+            )
+        )
+    monkeypatch.syspath_prepend(tmpdir)
+    first = apipkg.ApiModule(
+        "eager_first",
+        {"a": "eager_impl_a:value", "broken": "eager_impl_missing:value"},
+    )
+    second = apipkg.ApiModule(
+        "eager_second",
+        {"b": "eager_impl_b:value", "thread": "eager_impl_b:thread"},
+    )
+    for mod in first, second:
+        monkeypatch.setitem(sys.modules, mod.__name__, mod)
+    monkeypatch.setitem(
+        sys.modules,
+        "eager_alias",
+        apipkg.AliasModule("eager_alias", "eager_alias_missing"),
+    )
+    with pytest.raises(ImportError) as excinfo:
+        apipkg.eagerload()
+    message = str(excinfo.value)
+    assert message.index("eager_alias_missing") < message.index("eager_impl_missing")
+    assert isinstance(excinfo.value.__cause__, ImportError)
+    assert list(first.__map__) == ["broken"]
+    assert vars(second)["b"] is sys.modules["eager_impl_b"].value
+    assert vars(second)["thread"].startswith("apipkg-eager")
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_eager_initpkg_imports_package(tmpdir, backend):
+    pkgname = f"eagerinit_{backend}"
+    pkgdir = tmpdir.mkdir(pkgname)
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            f"""
+        import apipkg
+        apipkg.initpkg(
+            __name__, {{'x': '._impl:x'}}, eager=True, backend={backend!r}
+        )
+    """
+        )
+    )
+    pkgdir.join("_impl.py").write(
+        f"import {pkgname}\nfrom . import util\nx = util.value\n"
+    )
+    pkgdir.join("util.py").write("value = 42\n")
+    res = subprocess.run(
+        [sys.executable, "-c", f"import {pkgname}; print({pkgname}.x)"],
+        cwd=str(tmpdir),
+        stdout=subprocess.PIPE,
+        text=True,
+        timeout=30,
+    )
+    assert res.returncode == 0
+    assert res.stdout == "42\n"
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_freeze(monkeypatch, backend):
+    pkgname = f"freeze_{backend}"
+    for name in ["", ".path", ".sub", ".sub.tw"]:
+        monkeypatch.delitem(sys.modules, pkgname + name, raising=False)
+    mod = apipkg.initpkg(
+        pkgname,
+        {
+            "__doc__": "textwrap:__doc__",
+            "__onfirstaccess__": "gc:collect",
+            "dedent": "textwrap:dedent",
+            "path": "os.path",
+            "sub": {"tw": "textwrap", "join": "os.path:join"},
+        },
+        backend=backend,
+    )
+    sub = mod.sub
+    assert apipkg.freeze(mod) is mod
+    assert type(mod) is ModuleType and type(sub) is ModuleType
+    assert mod.__doc__ == textwrap.__doc__
+    assert vars(mod)["dedent"] is textwrap.dedent
+    assert mod.path is os.path and sys.modules[f"{pkgname}.path"] is os.path
+    assert mod.sub is sub and sub.join is os.path.join
+    assert sub.tw is textwrap and sys.modules[f"{pkgname}.sub.tw"] is textwrap
+    assert "__map__" not in vars(mod) and "__getattr__" not in vars(sub)
+    assert {"dedent", "path", "sub"} <= set(dir(mod))
+    assert mod not in apipkg.namespaces()
+    with pytest.raises(AttributeError):
+        mod.missing
+    with pytest.raises(TypeError, match="not an apipkg namespace"):
+        apipkg.freeze(mod)
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_defer(monkeypatch, backend):
+    pkgname = f"defer_{backend}"
+    names = ["", ".path", ".sub", ".sub.tw", ".other", ".other.inner", ".os.path"]
+    for name in names:
+        monkeypatch.delitem(sys.modules, pkgname + name, raising=False)
+    mod = apipkg.initpkg(
+        pkgname,
+        {
+            "path": "os.path",
+            "os.path": "os.path",
+            "sub": {"tw": "textwrap", "join": "os.path:join"},
+            "other": {"inner": {"dedent": "textwrap:dedent"}},
+        },
+        backend=backend,
+        defer=True,
+    )
+    assert f"{pkgname}.os.path" in sys.modules
+    for name in [".path", ".sub", ".other"]:
+        assert pkgname + name not in sys.modules
+
+    sub = importlib.import_module(f"{pkgname}.sub")
+    assert sys.modules[f"{pkgname}.sub"] is sub and mod.sub is sub
+    assert f"{pkgname}.sub.tw" not in sys.modules
+    assert sub.join is os.path.join
+    assert sub.tw.dedent is textwrap.dedent
+    assert sys.modules[f"{pkgname}.sub.tw"] is sub.tw
+
+    assert mod.path.join is os.path.join
+    assert sys.modules[f"{pkgname}.path"] is mod.path
+
+    assert f"{pkgname}.other" not in sys.modules
+    resolved = apipkg.resolve_many(mod)
+    assert resolved["other.inner.dedent"] is textwrap.dedent
+    assert mod.other.inner.dedent is textwrap.dedent
+    assert sys.modules[f"{pkgname}.other.inner"] is mod.other.inner
+    assert {"path", "sub", "other"} <= set(dir(mod))
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_defer_forgets_dead_parents(monkeypatch, backend):
+    pkgname = f"deferdead_{backend}"
+    monkeypatch.delitem(sys.modules, pkgname, raising=False)
+
+    def entries():
+        return sorted(n for n in apipkg._finder._deferred if n.startswith(pkgname))
+
+    spec = {"path": "os.path", "sub": {"join": "os.path:join"}}
+    apipkg.initpkg(pkgname, spec, backend=backend, defer=True)
+    assert entries() == [f"{pkgname}.path", f"{pkgname}.sub"]
+    # initializing it again replaces the entries of the previous exports
+    apipkg.initpkg(pkgname, {"sub": {}}, backend=backend, defer=True)
+    assert entries() == [f"{pkgname}.sub"]
+    del sys.modules[pkgname]
+    gc.collect()
+    assert entries() == []
+
+
+@pytest.mark.parametrize("backend", ["apimodule", "pep562"])
+def test_lazy_aliases(tmpdir, monkeypatch, backend):
+    pkgname = f"lazy_aliases_{backend}"
+    impl = f"{pkgname}_impl"
+    tmpdir.join(f"{impl}.py").write("import sys\nsys.lazy_alias_loaded = True\n")
+    monkeypatch.syspath_prepend(tmpdir)
+    monkeypatch.setattr(sys, "lazy_alias_loaded", False, raising=False)
+    for name in ["", ".impl", ".sub", ".sub.tw", ".sub.inner", impl]:
+        modname = name if name == impl else pkgname + name
+        monkeypatch.delitem(sys.modules, modname, raising=False)
+    mod = apipkg.initpkg(
+        pkgname,
+        {
+            "impl": impl,
+            "sub": {"tw": "textwrap", "inner": {"x": "textwrap:dedent"}},
+        },
+        backend=backend,
+        defer=True,
+        lazy_aliases=True,
+    )
+    assert impl not in sys.modules and f"{pkgname}.impl" not in sys.modules
+
+    aliased = importlib.import_module(f"{pkgname}.impl")
+    assert aliased is sys.modules[impl] is sys.modules[f"{pkgname}.impl"]
+    assert mod.impl is aliased
+    assert not isinstance(aliased, apipkg._alias_module._AliasModule)
+    # executed on first attribute access where lazy loading is thread-safe
+    assert sys.lazy_alias_loaded is (sys.version_info < (3, 13))
+    assert aliased.__name__ == impl
+    assert sys.lazy_alias_loaded
+
+    from textwrap import dedent
+
+    sub = importlib.import_module(f"{pkgname}.sub")
+    assert sub.__spec__.name == f"{pkgname}.sub"
+    assert sub.tw is sys.modules["textwrap"]
+    assert sys.modules[f"{pkgname}.sub.tw"] is sub.tw
+    assert importlib.import_module(f"{pkgname}.sub.inner").x is dedent
+
+
+def test_lazy_alias_of_submodule(tmpdir, monkeypatch):
+    pkgdir = tmpdir.mkdir("lazy_dotted_impl")
+    pkgdir.join("__init__.py").write("")
+    pkgdir.join("child.py").write("value = 1\n")
+    monkeypatch.syspath_prepend(tmpdir)
+    mod = apipkg.initpkg(
+        "lazy_dotted", {"child": "lazy_dotted_impl.child"}, lazy_aliases=True
+    )
+    child = mod.child
+    import lazy_dotted_impl.child  # type: ignore
+
+    assert lazy_dotted_impl.child is child
+    assert sys.modules["lazy_dotted_impl.child"] is child
+    assert child.value == 1
+
+
+def test_aresolve_awarm(tmpdir, monkeypatch):
+    import asyncio
+    from concurrent.futures import Executor
+
+    tmpdir.join("async_impl.py").write(
+        textwrap.dedent(
+            f"""
+        import time
+        with open({str(tmpdir.join("imports.log"))!r}, "a") as fp:
+            fp.write("imported\\n")
+        time.sleep(0.2)
+        slow = object()
+    """
+        )
+    )
+    monkeypatch.syspath_prepend(tmpdir)
+    mod = apipkg.initpkg(
+        "async_pkg",
+        {"slow": "async_impl:slow", "sub": {"a": "textwrap:dedent"}},
+    )
+
+    class NoExecutor(Executor):
+        def submit(self, fn, *args, **kwargs):
+            raise AssertionError("resolved names need no executor")
+
+    async def main():
+        ticks = []
+
+        async def tick():
+            while len(ticks) < 5:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        sync_access = threading.Thread(target=lambda: mod.slow)
+        value = asyncio.ensure_future(apipkg.aresolve(mod, "slow"))
+        await asyncio.sleep(0.05)
+        # the loop keeps running while the import sleeps on the executor
+        assert len(ticks) >= 3 and not value.done()
+        sync_access.start()
+        assert await value is sys.modules["async_impl"].slow
+        sync_access.join()
+        await ticker
+        assert await apipkg.aresolve(mod, "slow", NoExecutor()) is value.result()
+        assert await apipkg.awarm(mod, ["sub.a"]) == {"sub.a": textwrap.dedent}
+        assert await apipkg.awarm(mod, ["slow", "sub.a"], NoExecutor()) == {
+            "slow": value.result(),
+            "sub.a": textwrap.dedent,
+        }
+
+    asyncio.run(main())
+    assert tmpdir.join("imports.log").read() == "imported\n"
+
+
+def run_forked(fn):
+    """run fn in a forked child and return what it returned"""
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if not pid:
+        status = 1
+        try:
+            signal.alarm(10)
+            os.write(wfd, json.dumps(fn()).encode())
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(wfd)
+    with os.fdopen(rfd) as fp:
+        out = fp.read()
+    assert os.waitpid(pid, 0)[1] == 0
+    return json.loads(out)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_prefork_warmup(tmpdir, monkeypatch):
+    tmpdir.join("prefork_impl.py").write(
+        textwrap.dedent(
+            f"""
+        with open({str(tmpdir.join("imports.log"))!r}, "a") as fp:
+            fp.write("imported\\n")
+        value = object()
+    """
+        )
+    )
+    monkeypatch.syspath_prepend(tmpdir)
+    mod = apipkg.initpkg(
+        "prefork_pkg",
+        {"value": "prefork_impl:value", "sub": {"v": "prefork_impl:value"}},
+    )
+    other = apipkg.initpkg("prefork_other", {"dedent": "textwrap:dedent"})
+    apipkg.prefork_warmup(["prefork_pkg", "prefork_other.dedent"])
+    assert gc.get_freeze_count() > 0
+    gc.unfreeze()
+    assert mod.__map__ == {} and mod.sub.__map__ == {} and other.__map__ == {}
+    parent = id(mod.value)
+
+    def child():
+        return [mod.__map__, id(mod.value), id(mod.sub.v), other.dedent.__name__]
+
+    assert run_forked(child) == [{}, parent, parent, "dedent"]
+    assert tmpdir.join("imports.log").read() == "imported\n"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_fork_while_resolving(locking):
+    locking("per-export")
+    mod = apipkg.initpkg("fork_resolving", {"dedent": "textwrap:dedent"})
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        with apipkg._syncronized._resolving("fork_resolving", "dedent"):
+            with apipkg._syncronized._mutex:
+                holding.set()
+                release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    holding.wait()
+    try:
+        # the holder thread does not exist in the child, neither its cell nor
+        # the bookkeeping mutex it holds may block resolving there
+        assert run_forked(lambda: mod.dedent.__name__) == "dedent"
+    finally:
+        release.set()
+        thread.join()
+    assert mod.dedent is textwrap.dedent
+
+
+def test_namespace_registry():
+    api = apipkg.ApiModule(
+        "registry_test",
+        {
+            "dedent": "textwrap:dedent",
+            "indent": "textwrap:indent",
+            "sub": {"join": "os.path:join"},
+            "tw": "textwrap",
+        },
+    )
+    pep = apipkg.initpkg("registry_pep562", {"x": "os:sep"}, backend="pep562")
+    live = apipkg.namespaces()
+    assert api in live and api.sub in live and pep in live
+    assert live == sorted(live, key=lambda m: m.__name__)
+
+    def status():
+        return {
+            s.name: s
+            for s in apipkg.namespace_status()
+            if s.name.startswith(("registry_test", "registry_pep562"))
+        }
+
+    assert status() == {
+        "registry_test": ("registry_test", "namespace", 2, 0),
+        "registry_test.sub": ("registry_test.sub", "namespace", 1, 0),
+        "registry_test.tw": ("registry_test.tw", "alias", 1, 0),
+        "registry_pep562": ("registry_pep562", "namespace", 1, 0),
+    }
+    api.dedent
+    api.tw.dedent
+    pep.x
+    current = status()
+    assert current["registry_test"].resolved == 1
+    assert current["registry_test"].pending == 1
+    assert current["registry_test.tw"] == ("registry_test.tw", "alias", 0, 1)
+    assert current["registry_pep562"].resolved == 1
+
+    for name in status():
+        sys.modules.pop(name, None)
+    del api, pep, live, current
+    gc.collect()
+    assert not status()
+
+
 @pytest.fixture
 def find_spec():
     try:
@@ -886,3 +2092,201 @@ def test_importlib_find_spec_initpkg(find_spec, tmpdir, monkeypatch):
     monkeypatch.syspath_prepend(tmpdir)
     find_spec(modname)
     find_spec(modname + ".email")
+
+
+def test_benchmarks_smoke(tmpdir):
+    script = os.path.join(os.path.dirname(__file__), "bench", "bench_apipkg.py")
+    out = tmpdir.join("bench.json")
+    cmd = [sys.executable, script, "--quick", "-k", "steady_access"]
+    subprocess.check_call(cmd + ["--json", str(out)], stdout=subprocess.DEVNULL)
+    results = json.loads(out.read())["results"]
+    assert "steady_access[apimodule]" in results
+    baseline = tmpdir.join("baseline.json")
+    baseline.write(json.dumps({"results": {k: v / 1000 for k, v in results.items()}}))
+    res = subprocess.run(
+        cmd + ["--compare", str(baseline)], stdout=subprocess.PIPE, text=True
+    )
+    assert res.returncode == 1
+    assert "REGRESSION steady_access[apimodule]" in res.stdout
+
+
+def test_stress_smoke(tmpdir):
+    script = os.path.join(os.path.dirname(__file__), "bench", "stress_apipkg.py")
+    out = tmpdir.join("stress.json")
+    cmd = [sys.executable, script, "--quick", "--json", str(out)]
+    subprocess.check_call(cmd, stdout=subprocess.DEVNULL)
+    report = json.loads(out.read())
+    assert report["failures"] == []
+    assert report["locking"] == ["global", "per-export"]
+    results = report["results"]
+    assert results["pep562-defer-per-export-4-threads"]["steady_per_second"] > 0
+    assert results["apimodule-plain-global-4-threads"]["steady_per_second"] > 0
+
+
+def make_cli_package(tmpdir, pkgname, extra=""):
+    pkgdir = tmpdir.mkdir(pkgname)
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, {
+            'a': '.impl_a:a',
+            'b': '.impl_b:b',
+            'sub': {'c': '.impl_b:c'},
+            'tw': 'textwrap',
+            'broken': '.impl_a:missing',
+        %s})
+    """
+        )
+        % extra
+    )
+    pkgdir.join("heavy.py").write("")
+    pkgdir.join("impl_a.py").write("a = 1")
+    pkgdir.join("impl_b.py").write("from . import heavy\nb = c = 2")
+    return dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmpdir), *sys.path]))
+
+
+def test_importgraph_cli(tmpdir):
+    env = make_cli_package(tmpdir, "graphpkg")
+    res = subprocess.run(
+        [sys.executable, "-m", "apipkg", "importgraph", "graphpkg", "--json"],
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    assert res.returncode == 1
+    report = json.loads(res.stdout)
+    exports = {e["export"]: e for e in report["exports"]}
+    assert sorted(exports) == [
+        "graphpkg.a",
+        "graphpkg.b",
+        "graphpkg.broken",
+        "graphpkg.sub.c",
+        "graphpkg.tw",
+    ]
+    assert [m["name"] for m in exports["graphpkg.a"]["modules"]] == ["graphpkg.impl_a"]
+    assert {m["name"] for m in exports["graphpkg.b"]["modules"]} == {
+        "graphpkg.heavy",
+        "graphpkg.impl_b",
+    }
+    assert exports["graphpkg.b"]["total_us"] > 0
+    assert exports["graphpkg.a"]["error"] is None
+    assert "AttributeError" in exports["graphpkg.broken"]["error"]
+    assert report["modules"]["graphpkg.heavy"] == ["graphpkg.b", "graphpkg.sub.c"]
+
+
+def test_check_cli(tmpdir):
+    env = make_cli_package(
+        tmpdir,
+        "checkpkg",
+        extra="'gone': '.impl_gone:x', 'mods': {'fails': '.impl_fails'},\n",
+    )
+    tmpdir.join("checkpkg", "impl_fails.py").write("raise RuntimeError('boom')")
+    res = subprocess.run(
+        [sys.executable, "-m", "apipkg", "check", "checkpkg", "--json", "--jobs=2"],
+        stdout=subprocess.PIPE,
+        env=env,
+    )
+    assert res.returncode == 1
+    report = json.loads(res.stdout)
+    exports = {e["export"]: e for e in report["exports"]}
+    assert sorted(exports) == [
+        "checkpkg.a",
+        "checkpkg.b",
+        "checkpkg.broken",
+        "checkpkg.gone",
+        "checkpkg.mods.fails",
+        "checkpkg.sub.c",
+        "checkpkg.tw",
+    ]
+    assert report["failed"] == 3
+    assert exports["checkpkg.sub.c"]["status"] == "ok"
+    assert exports["checkpkg.sub.c"]["spec"] == "checkpkg.impl_b:c"
+    assert exports["checkpkg.b"]["seconds"] > 0
+    assert exports["checkpkg.tw"]["status"] == "ok"
+    assert exports["checkpkg.broken"]["status"] == "broken-spec"
+    assert "missing" in exports["checkpkg.broken"]["error"]
+    assert exports["checkpkg.gone"]["status"] == "import-error"
+    assert "ModuleNotFoundError" in exports["checkpkg.gone"]["error"]
+    assert exports["checkpkg.mods.fails"]["status"] == "import-error"
+    assert exports["checkpkg.mods.fails"]["error"] == "RuntimeError: boom"
+
+    res = subprocess.run(
+        [sys.executable, "-m", "apipkg", "check", "checkpkg"],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        env=env,
+    )
+    lines = res.stdout.splitlines()
+    assert lines[0].startswith("FAILED checkpkg.")
+    assert lines[-1].startswith("7 exports checked, 3 failed in ")
+
+
+def test_check_static(tmpdir, monkeypatch):
+    from apipkg._check import check
+
+    pkgdir = tmpdir.mkdir("staticpkg")
+    pkgdir.join("__init__.py").write(
+        textwrap.dedent(
+            """
+        import apipkg
+        apipkg.initpkg(__name__, {
+            'direct': '._impl:direct',
+            'reexport': '._impl:joined',
+            'starred': '._impl:public',
+            'hidden': '._impl:private',
+            'method': '._impl:Cls.method',
+            'runtime': '._impl:direct.real',
+            'lazy': '._dyn:anything',
+            'pi': 'math:pi',
+            'nope': 'math:nope',
+            'sub': {'missing': '._impl:missing', 'heavy': '._impl:heavy'},
+            'alias': '._impl',
+            'gone': '._gone:x',
+        })
+    """
+        )
+    )
+    pkgdir.join("_impl.py").write(
+        textwrap.dedent(
+            """
+        raise RuntimeError("static checks must not import this")
+        from os.path import join as joined
+        from ._star import *
+        from . import heavy
+        try:
+            direct = 1
+        except ImportError:
+            pass
+        class Cls:
+            def method(self):
+                pass
+    """
+        )
+    )
+    pkgdir.join("_dyn.py").write("def __getattr__(name):\n    return name\n")
+    pkgdir.join("heavy.py").write("")
+    pkgdir.join("_star.py").write("__all__ = ['public']\npublic = private = 1\n")
+    monkeypatch.syspath_prepend(tmpdir)
+    for name in ["", ".sub", ".alias", "._impl"]:
+        monkeypatch.delitem(sys.modules, "staticpkg" + name, raising=False)
+
+    results = {r.export: r for r in check("staticpkg", static=True)}
+    assert "staticpkg._impl" not in sys.modules
+    status = {export: r.status for export, r in results.items()}
+    assert status == {
+        "staticpkg.direct": "ok",
+        "staticpkg.reexport": "ok",
+        "staticpkg.starred": "ok",
+        "staticpkg.hidden": "broken-spec",
+        "staticpkg.method": "ok",
+        "staticpkg.runtime": "unverified",
+        "staticpkg.lazy": "unverified",
+        "staticpkg.pi": "ok",
+        "staticpkg.nope": "broken-spec",
+        "staticpkg.sub.missing": "broken-spec",
+        "staticpkg.sub.heavy": "ok",
+        "staticpkg.alias": "ok",
+        "staticpkg.gone": "import-error",
+    }
+    assert results["staticpkg.lazy"].error == "staticpkg._dyn has a module __getattr__"
+    assert all(r.seconds < 1 for r in results.values())